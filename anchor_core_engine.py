@@ -4,184 +4,413 @@ anchor_core_engine_v6.py
 Anchor v6 — Core Engine with Drift-Weighted Perception and Speech Gating
 """
 import math, random, json, importlib
+from array import array
+from collections.abc import MutableMapping
+from types import MappingProxyType
 from typing import Dict, Any
 
+# ---------- Compact layout -----------------------------------------
+# All sessions share one key ordering. The perception (core) and goal
+# vectors live side by side in a single float array:
+#     [Fear, Safety, Time, Choice | Fear, Safety, Time, Choice]
+ANCHOR_KEYS = ("Fear", "Safety", "Time", "Choice")
+_ANCHOR_INDEX = {k: i for i, k in enumerate(ANCHOR_KEYS)}
+_N = len(ANCHOR_KEYS)
+_CORE_OFF, _GOAL_OFF = 0, _N
+
+_CORE_DEFAULT = (0.5, 0.5, 0.5, 0.5)
+_GOAL_DEFAULT = (0.2, 0.8, 0.4, 0.6)
+_PRIORITY_DEFAULT = MappingProxyType({"environment": 0.4, "state": 0.6, "self": 0.8})
+_NULL_PLUGIN = object()
+
+# behavior_log is an audit tail, not a history: tick() trims it back to
+# the newest BEHAVIOR_LOG_KEEP entries once it doubles, and snapshots
+# only carry that many.
+BEHAVIOR_LOG_KEEP = 100
+
+# Snapshot shape written by export_state(); bump when fields change and
+# register an upgrade step in redis_bulk.UPGRADES.
+STATE_VERSION = 1
+
+
+class AnchorVector(MutableMapping):
+    """
+    Dict-style view over one half of a session's float array.
+    Keys are fixed to ANCHOR_KEYS; writes go straight to the buffer so
+    `session.core["Fear"] = x` keeps working for seeds and callers.
+    """
+    __slots__ = ("_buf", "_off")
+
+    def __init__(self, buf: array, off: int):
+        self._buf, self._off = buf, off
+
+    def __getitem__(self, key):
+        return self._buf[self._off + _ANCHOR_INDEX[key]]
+
+    def __setitem__(self, key, value):
+        self._buf[self._off + _ANCHOR_INDEX[key]] = value
+
+    def __delitem__(self, key):
+        raise TypeError("anchor vectors have a fixed layout")
+
+    def __iter__(self):
+        return iter(ANCHOR_KEYS)
+
+    def __len__(self):
+        return _N
+
+    def __contains__(self, key):
+        return key in _ANCHOR_INDEX
+
+    def get(self, key, default=None):
+        i = _ANCHOR_INDEX.get(key)
+        return default if i is None else self._buf[self._off + i]
+
+    def copy(self) -> Dict[str, float]:
+        """Plain dict snapshot (JSON-serialisable)."""
+        return dict(zip(ANCHOR_KEYS, self._buf[self._off:self._off + _N]))
+
+    def assign(self, values) -> None:
+        """Copy known keys from *values*; anything outside ANCHOR_KEYS is ignored."""
+        for k, i in _ANCHOR_INDEX.items():
+            if k in values:
+                self._buf[self._off + i] = values[k]
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class PriorityWeights(MutableMapping):
+    """
+    Copy-on-write view of a session's ESS priority weights. Reads hit the
+    shared default until the first write gives the session a private dict.
+    """
+    __slots__ = ("_session",)
+
+    def __init__(self, session: "AnchorSession"):
+        self._session = session
+
+    def _own(self) -> dict:
+        s = self._session
+        if s._priority_weights is _PRIORITY_DEFAULT:
+            s._priority_weights = dict(_PRIORITY_DEFAULT)
+        return s._priority_weights
+
+    def __getitem__(self, key):
+        return self._session._priority_weights[key]
+
+    def __setitem__(self, key, value):
+        self._own()[key] = value
+
+    def __delitem__(self, key):
+        del self._own()[key]
+
+    def __iter__(self):
+        return iter(self._session._priority_weights)
+
+    def __len__(self):
+        return len(self._session._priority_weights)
+
+    def copy(self) -> dict:
+        return dict(self._session._priority_weights)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class _Lazy:
+    """Slot-backed attribute that is only allocated on first access."""
+    __slots__ = ("slot", "factory")
+
+    def __init__(self, slot, factory):
+        self.slot, self.factory = slot, factory
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        val = getattr(obj, self.slot)
+        if val is None:
+            val = self.factory()
+            setattr(obj, self.slot, val)
+        return val
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+class _MiniScheduler:
+    """Tick-based scheduler (same API as the cyber plug-in's MiniScheduler)."""
+    __slots__ = ("jobs",)
+
+    def __init__(self):
+        self.jobs = {}
+
+    def every(self, ticks, fn, job_id):
+        self.jobs[job_id] = {"type": "repeat", "int": ticks, "next": ticks, "fn": fn}
+
+    def delay(self, ticks, fn, job_id):
+        self.jobs[job_id] = {"type": "once", "next": ticks, "fn": fn}
+
+    def cancel(self, job_id):
+        self.jobs.pop(job_id, None)
+
+    def tick(self):
+        for jid, job in list(self.jobs.items()):
+            job["next"] -= 1
+            if job["next"] <= 0:
+                job["fn"]()
+                if job["type"] == "once":
+                    self.jobs.pop(jid, None)
+                else:
+                    job["next"] = job["int"]
+
+
 class AnchorSession:
+    __slots__ = (
+        "_vec", "_core", "_goal", "_priority_weights",
+        "plugin", "_scheduler",
+        "_memory_orbit", "_behavior_log", "_efficiency_history",
+        "_container", "_ripple_tags", "_active_controls", "id",
+        "_chaos_sum", "_chaos_n",
+        "focus", "goal", "ticks", "ego_resistance",
+        "environment_driven", "memory_driven",
+        "curiosity", "purpose", "identity_coherence", "goal_confidence",
+        "persona_style", "trust_level", "trust_variance", "distrust_decay", "distrust",
+        # set by seed.apply_seed / bridge_utils when present
+        "anchor_weights", "feature_flags", "personality_vector",
+        "consequence_drift_map", "memory_cache",
+        # plug-in owned state (cx_sched, ...) — only allocated if a plug-in sets something
+        "__dict__",
+    )
+
+    scheduler = _Lazy("_scheduler", _MiniScheduler)
+    memory_orbit = _Lazy("_memory_orbit", list)
+    behavior_log = _Lazy("_behavior_log", list)
+    efficiency_history = _Lazy("_efficiency_history", list)
+    container = _Lazy("_container", dict)
+    ripple_tags = _Lazy("_ripple_tags", dict)
+    active_controls = _Lazy("_active_controls", set)
+
     def __init__(self, persona: str = None):
-        self.core = {"Fear": 0.5, "Safety": 0.5, "Time": 0.5, "Choice": 0.5}
-        self.goal_vector = {"Fear": 0.2, "Safety": 0.8, "Time": 0.4, "Choice": 0.6}
+        self._vec = array("d", _CORE_DEFAULT + _GOAL_DEFAULT)
+        self._core = AnchorVector(self._vec, _CORE_OFF)
+        self._goal = AnchorVector(self._vec, _GOAL_OFF)
+        self._priority_weights = _PRIORITY_DEFAULT
 
-# Plugin loader & per-session scheduler
+# Plugin loader & per-session scheduler (created on first use)
         self.plugin = self._load_plugin(persona)
-        self.scheduler = _MiniScheduler()
-        self.memory_orbit, self.behavior_log, self.container = [], [], {}
+        self._scheduler = None
+        self._memory_orbit = self._behavior_log = self._efficiency_history = None
+        self._container = self._ripple_tags = self._active_controls = None
+        self.id = None
         self.focus, self.goal = None, None
         self.ticks, self.ego_resistance = 0, 0.5
         self.environment_driven, self.memory_driven = 0, 0
-        self.ripple_tags = {}
         self.curiosity, self.purpose = 0.5, 0.5
         self.identity_coherence, self.goal_confidence = 1.0, 0.0
         self.persona_style = "Observer"
         self.trust_level, self.trust_variance, self.distrust_decay = 0.5, 0.1, 0.01
-        self.priority_weights = {"environment": 0.4, "state": 0.6, "self": 0.8}
         self.distrust = 1 - self.trust_level
 
-        self.efficiency_history, self.chaos_history = [], []
+        # chaos history is only ever averaged, so keep a running mean
+        self._chaos_sum, self._chaos_n = 0.0, 0
+
+    # ---------- Dict-style views ----------------------------------------
+    @property
+    def core(self) -> AnchorVector:
+        return self._core
+
+    @core.setter
+    def core(self, values):
+        self._core.assign(values)
+
+    @property
+    def goal_vector(self) -> AnchorVector:
+        return self._goal
+
+    @goal_vector.setter
+    def goal_vector(self, values):
+        self._goal.assign(values)
+
+    @property
+    def priority_weights(self) -> PriorityWeights:
+        return PriorityWeights(self)
+
+    @priority_weights.setter
+    def priority_weights(self, weights):
+        self._priority_weights = dict(weights)
 
     @property
     def Instability(self):
-        return self.core.get("Fear", 0.5)
+        return self._vec[_CORE_OFF + 0]
 
     @property
     def Stability(self):
-        return self.core.get("Safety", 0.5)
+        return self._vec[_CORE_OFF + 1]
+
+    def compute_instability(self) -> float:
+        return self._vec[_CORE_OFF + 0]
+
+    # ---------- Playbook controls (driven by plug-ins) ----------------
+    def activate_control(self, control: str):
+        if control not in self.active_controls:
+            self.active_controls.add(control)
+            self.behavior_log.append(f"[Control] {control} active")
+
+    def deactivate_control(self, control: str):
+        if self._active_controls and control in self._active_controls:
+            self._active_controls.discard(control)
+            self.behavior_log.append(f"[Control] {control} released")
 
     def update_trust_and_curiosity(self):
-        fear = self.core.get("Fear", 0.5)
-        safety = self.core.get("Safety", 0.5)
-        time_urgency = self.core.get("Time", 0.5)
+        fear, safety, time_urgency = self._vec[0], self._vec[1], self._vec[2]
         self.curiosity = max(0, min(1, (safety - fear) * (1 - time_urgency)))
 
     def update_goal_confidence(self):
-        dot = sum(self.core[a] * self.goal_vector[a] for a in self.core)
-        mag = math.sqrt(sum(v*v for v in self.core.values())) * math.sqrt(sum(v*v for v in self.goal_vector.values()))
+        core, goal = self._vec[:_N], self._vec[_N:]
+        dot = sum(c * g for c, g in zip(core, goal))
+        mag = math.sqrt(sum(v*v for v in core)) * math.sqrt(sum(v*v for v in goal))
         self.goal_confidence = dot / max(1e-6, mag)
-    
-    
-    
-# ---------- Plug-in loader ---------------------------------------
-def _load_plugin(self, name):
-    """Import plugins.<persona>.plugin if available, else null object."""
-    if not name:
-        return object()
-    try:
-        mod = importlib.import_module(f"plugins.{name}.plugin")
-        return mod.Plugin()
-    except ModuleNotFoundError:
-        return object()
-# -----------------------------------------------------------------
-# ---------- Identity coherence ------------------------------------
+
+    # ---------- Plug-in loader ---------------------------------------
+    @staticmethod
+    def _load_plugin(name):
+        """Import plugins.<persona>.plugin if available, else null object."""
+        if not name:
+            return _NULL_PLUGIN
+        try:
+            mod = importlib.import_module(f"plugins.{name}.plugin")
+            return mod.Plugin()
+        except ModuleNotFoundError:
+            return _NULL_PLUGIN
+
+    # ---------- Identity coherence ------------------------------------
     def get_identity_coherence(self) -> float:
         """
         Coherence = 1 − average absolute drift between current perception
         vector and goal vector. 1.0 → perfectly aligned, 0.0 → decoherent.
         """
-        avg_drift = sum(
-            abs(self.core[a] - self.goal_vector.get(a, 0.5))
-            for a in self.core
-        ) / len(self.core)
+        v = self._vec
+        avg_drift = sum(abs(v[i] - v[i + _N]) for i in range(_N)) / _N
 
         self.identity_coherence = max(0.0, min(1.0, 1 - avg_drift))
         return self.identity_coherence
-    
+
     # ------------------------------------------------------------------
-    #  Persistence helpers  
+    #  Persistence helpers
     # ------------------------------------------------------------------
     def export_state(self) -> dict:
         """Return a JSON-serialisable snapshot of the session."""
         return {
-            "core": self.core,
-            "goal_vector": self.goal_vector,
+            "version": STATE_VERSION,
+            "core": self._core.copy(),
+            "goal_vector": self._goal.copy(),
             "ticks": self.ticks,
-            "identity_coherence": getattr(self, "identity_coherence", None),
-            "goal_confidence":  getattr(self, "goal_confidence",  None),
-            "memory_orbit":     getattr(self, "memory_orbit",     []),
-            "behavior_log":     self.behavior_log,
+            "identity_coherence": self.identity_coherence,
+            "goal_confidence":  self.goal_confidence,
+            "memory_orbit":     self._memory_orbit or [],
+            "behavior_log":     (self._behavior_log or [])[-BEHAVIOR_LOG_KEEP:],
         }
 
+    def export_view(self) -> Dict[str, Any]:
+        """Human-readable diagnostic view (used by get_anchor_state)."""
+        # --- core vector aliasing ---
+        vec = self._core.copy()
+        vec["Instability"] = vec.pop("Fear", vec.get("Instability", 0.0))
+        vec["Stability"]   = vec.pop("Safety", vec.get("Stability", 0.0))
 
-def export_view(self) -> Dict[str, Any]:
-    """Human-readable diagnostic view (used by get_anchor_state)."""
-    # --- core vector aliasing ---
-    vec = self.core.copy()
-    vec["Instability"] = vec.pop("Fear", vec.get("Instability", 0.0))
-    vec["Stability"]   = vec.pop("Safety", vec.get("Stability", 0.0))
-
-    # --- personality vector ---
-    personality = (
-        getattr(self, "personality_vector", None)
-        or getattr(self, "anchor_weights", None)
-        or None
-    )
+        # --- personality vector ---
+        personality = (
+            getattr(self, "personality_vector", None)
+            or getattr(self, "anchor_weights", None)
+            or None
+        )
 
-    return {
-        "tick": self.ticks,
-        "anchor_vector": vec,
-        "curiosity_level": getattr(self, "curiosity", None),
-        "identity_coherence": getattr(self, "identity_coherence", None),
-        "goal_confidence": getattr(self, "goal_confidence", None),
-        "persona_style": getattr(self, "persona_style", None),
-        "collapse_vector": self.describe_collapse_vector(),
-        "in_chaos": self.is_in_chaos(),
-        "personality_vector": personality,
-    }
+        return {
+            "tick": self.ticks,
+            "anchor_vector": vec,
+            "curiosity_level": self.curiosity,
+            "identity_coherence": self.identity_coherence,
+            "goal_confidence": self.goal_confidence,
+            "persona_style": self.persona_style,
+            "collapse_vector": self.describe_collapse_vector(),
+            "in_chaos": self.is_in_chaos(),
+            "personality_vector": personality,
+        }
 
     def import_state(self, state: dict):
         """Rehydrate a session from a snapshot produced by export_state()."""
-        self.core            = state.get("core",            self.core)
-        self.goal_vector     = state.get("goal_vector",     self.goal_vector)
-        self.ticks           = state.get("ticks",           0)
+        self._core.assign(state.get("core", {}))
+        self._goal.assign(state.get("goal_vector", {}))
+        self.ticks              = state.get("ticks",              0)
         self.identity_coherence = state.get("identity_coherence", 1.0)
         self.goal_confidence    = state.get("goal_confidence",    0.0)
-        self.memory_orbit       = state.get("memory_orbit",       [])
-        self.behavior_log       = state.get("behavior_log",       [])
+        self._memory_orbit      = state.get("memory_orbit") or None
+        self._behavior_log      = (state.get("behavior_log") or [])[-BEHAVIOR_LOG_KEEP:] or None
 
     def _adaptive_corr(self):
-        win = min(50, len(self.efficiency_history)) if len(self.efficiency_history) > 20 else len(self.efficiency_history)
-        avg = sum(self.efficiency_history[-win:]) / max(1, win)
+        hist = self._efficiency_history or ()
+        win = min(50, len(hist)) if len(hist) > 20 else len(hist)
+        avg = sum(hist[-win:]) / max(1, win) if win else 0.0
         base = 0.5 + (self.ego_resistance - 0.5) * 0.2
         return max(0.3, min(0.7, base + (avg - 0.5) * 0.3))
 
     def _apply_updates(self, updates):
         c = self._adaptive_corr()
+        v, idx = self._vec, _ANCHOR_INDEX
         for k, d in updates.items():
-            if k in self.core:
+            i = idx.get(k)
+            if i is not None:
                 direction = d if self.goal_confidence > 0.5 else -c * d
-                self.core[k] = max(0, min(1, self.core[k] + direction))
+                v[i] = max(0, min(1, v[i] + direction))
 
     def _soft_reset(self):
         hi, lo = 0.9, 0.1
         amt = 0.05 * (1 + self.ticks * 0.01)
-        for a in self.core:
-            if self.core[a] >= hi:
-                self.core[a] -= amt
-            elif self.core[a] <= lo:
-                self.core[a] += amt
-            self.core[a] = max(0, min(1, self.core[a]))
+        v = self._vec
+        for i in range(_N):
+            if v[i] >= hi:
+                v[i] -= amt
+            elif v[i] <= lo:
+                v[i] += amt
+            v[i] = max(0, min(1, v[i]))
 
     def _chaos_recalibrate(self):
-        hist = len(self.chaos_history)
-        avg = sum(self.chaos_history[-hist:]) / hist if hist else 0
-        dominant = max(self.core, key=lambda x: abs(self.core[x] - self.goal_vector[x]))
+        avg = self._chaos_sum / self._chaos_n if self._chaos_n else 0
+        v = self._vec
+        dominant = max(range(_N), key=lambda i: abs(v[i] - v[i + _N]))
         shift = 0.05 * (1 + avg * 0.1)
-        self.core[dominant] = max(0, min(1, self.core[dominant] - shift))
-        self.behavior_log.append(f"[Chaos] Recalibration on {dominant}")
-        self.chaos_history.append(avg)
+        v[dominant] = max(0, min(1, v[dominant] - shift))
+        self.behavior_log.append(f"[Chaos] Recalibration on {ANCHOR_KEYS[dominant]}")
+        self._chaos_sum += avg
+        self._chaos_n += 1
 
     def _drift_from_memory(self):
-        for mem in self.memory_orbit:
+        v = self._vec
+        for mem in self._memory_orbit or ():
             if mem.get('tier') == 'active':
-                for anchor in self.core:
-                    self.core[anchor] = max(0, min(1, self.core[anchor] + mem.get('bias', {}).get(anchor, 0.0)))
+                bias = mem.get('bias', {})
+                for i, anchor in enumerate(ANCHOR_KEYS):
+                    v[i] = max(0, min(1, v[i] + bias.get(anchor, 0.0)))
 
     def tick(self, updates=None, positive=True):
-        updates = updates or {k: 0.0 for k in self.core}
+        updates = updates or {k: 0.0 for k in ANCHOR_KEYS}
         self.update_trust_level(positive)
         self.update_trust_and_curiosity()
         self.update_goal_confidence()
         if self.curiosity > 0:
             g = self.curiosity * 0.05
-            updates = {k: updates.get(k, 0)+random.uniform(-g, g) for k in self.core}
+            updates = {k: updates.get(k, 0)+random.uniform(-g, g) for k in ANCHOR_KEYS}
         if self.purpose > 0.7:
-            bias = {k: (self.goal_vector[k] - self.core[k]) * 0.05 * self.purpose for k in self.core}
-            updates = {k: updates.get(k, 0)+bias[k] for k in self.core}
+            bias = {k: (self._goal[k] - self._core[k]) * 0.05 * self.purpose for k in ANCHOR_KEYS}
+            updates = {k: updates.get(k, 0)+bias[k] for k in ANCHOR_KEYS}
         self._chaos_recalibrate()
         updates = self.apply_ess_weights(updates)
         self._apply_updates(updates)
         self._drift_from_memory()
         self._soft_reset()
-        if hasattr(self, "scheduler"):
-            self.scheduler.tick()
+        if self._scheduler is not None:
+            self._scheduler.tick()
         self.ticks += 1
 
         if self.get_identity_coherence() < 0.4:
@@ -190,16 +419,21 @@ def export_view(self) -> Dict[str, Any]:
         if self.is_in_chaos():
             self.behavior_log.append("[Chaos] Drift threshold exceeded. Collapse imminent.")
 
+        log = self._behavior_log
+        if log is not None and len(log) > 2 * BEHAVIOR_LOG_KEEP:
+            del log[:-BEHAVIOR_LOG_KEEP]
+
     def is_in_chaos(self) -> bool:
-        drift = sum(abs(self.core[k] - self.goal_vector[k]) for k in self.core)
+        v = self._vec
+        drift = sum(abs(v[i] - v[i + _N]) for i in range(_N))
         return drift > 1.2
 
     def describe_collapse_vector(self):
         if self.curiosity > 0.7 and self.identity_coherence > 0.5:
             return "Reflective – perception coherent"
-        elif self.core["Fear"] > 0.8:
+        elif self._core["Fear"] > 0.8:
             return "Instability high – caution advised"
-        elif self.core["Choice"] > 0.7:
+        elif self._core["Choice"] > 0.7:
             return "Impact ready – decision imminent"
         return "Neutral – drifting"
 
@@ -211,11 +445,12 @@ def export_view(self) -> Dict[str, Any]:
 
     def apply_ess_weights(self, deltas):
         weighted = deltas.copy()
+        pw = self._priority_weights
         for anchor in weighted:
             if anchor in ("Fear", "Safety"):
-                weighted[anchor] *= self.priority_weights["environment"]
+                weighted[anchor] *= pw["environment"]
             elif anchor in ("Time",):
-                weighted[anchor] *= self.priority_weights["state"]
+                weighted[anchor] *= pw["state"]
             elif anchor in ("Choice",):
-                weighted[anchor] *= self.priority_weights["self"]
+                weighted[anchor] *= pw["self"]
         return weighted
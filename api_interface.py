@@ -1,5 +1,6 @@
 from typing import Dict, Any
 from bridge_utils import bridge_input, get_anchor_state, load_memory, initialize_anchor1_memory
+from tracing import span
 
 class AnchorAPI:
     def __init__(self, session):
@@ -15,7 +16,8 @@ class AnchorAPI:
         return conditional_anchor_response(self.session, input_data)
 
     def run_tick(self, updates: Dict[str, float]) -> Dict[str, Any]:
-        self.session.tick(updates)
+        with span("tick"):
+            self.session.tick(updates)
         from bridge_utils import conditional_anchor_response
         return conditional_anchor_response(self.session, '[tick]')
 
@@ -0,0 +1,71 @@
+"""
+bench_session_memory.py
+-----------------------
+Measure the resident footprint of AnchorSession objects.
+
+    python bench_session_memory.py --sessions 20000 --ticks 5
+
+Prints JSON: bytes per session fresh, after import_state() from a
+snapshot (the Redis path in main.py), after a few ticks, and restored
+from a long-lived session's snapshot (--long-ticks), which shows that
+the capped behavior_log keeps old sessions from growing.
+"""
+import argparse, gc, json, tracemalloc
+
+from anchor_core_engine import AnchorSession, BEHAVIOR_LOG_KEEP
+
+
+def _per_session(factory, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    keep = [factory() for _ in range(n)]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return (used - base) / n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure AnchorSession memory footprint")
+    ap.add_argument("--sessions", type=int, default=20000)
+    ap.add_argument("--ticks", type=int, default=5)
+    ap.add_argument("--long-ticks", type=int, default=2000)
+    args = ap.parse_args()
+
+    def snapshot(ticks):
+        ref = AnchorSession()
+        for _ in range(ticks):
+            ref.tick()
+        return json.dumps(ref.export_state())
+
+    blob, long_blob = snapshot(args.ticks), snapshot(args.long_ticks)
+
+    def restored(src=blob):
+        s = AnchorSession()
+        s.import_state(json.loads(src))
+        return s
+
+    def ticked():
+        s = AnchorSession()
+        for _ in range(args.ticks):
+            s.tick()
+        return s
+
+    print(json.dumps({
+        "sessions": args.sessions,
+        "ticks": args.ticks,
+        "long_ticks": args.long_ticks,
+        "behavior_log_keep": BEHAVIOR_LOG_KEEP,
+        "snapshot_bytes": {"ticked": len(blob), "long_lived": len(long_blob)},
+        "bytes_per_session": {
+            "fresh": round(_per_session(AnchorSession, args.sessions), 1),
+            "restored": round(_per_session(restored, args.sessions), 1),
+            "ticked": round(_per_session(ticked, args.sessions), 1),
+            "long_lived": round(_per_session(lambda: restored(long_blob), args.sessions), 1),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
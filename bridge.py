@@ -2,8 +2,10 @@ from fastapi import FastAPI, Request
 from startup import initialize_anchor
 from anchor_core_engine import AnchorSession
 from bridge_utils import bridge_input, get_anchor_state
+from tracing import install as install_tracing, span
 
 app = FastAPI(title="Anchor1 Bridge", version="1.0")
+install_tracing(app, service="bridge")
 session = initialize_anchor()
 
 @app.get("/")
@@ -22,7 +24,8 @@ async def send_input(request: Request):
 async def run_tick(request: Request):
     data = await request.json()
     updates = data.get("anchor_updates", {})
-    session.tick(updates)
+    with span("tick"):
+        session.tick(updates)
     from bridge_utils import conditional_anchor_response
     return conditional_anchor_response(session, '[tick]')
 
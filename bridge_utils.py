@@ -1,6 +1,7 @@
 from typing import Dict, Any
 import os, json, uuid
 from anchor_core_engine import AnchorSession
+from tracing import span
 
 """
 bridge_utils.py – unified version (patch 2025‑06‑15)
@@ -29,12 +30,11 @@ def load_memory(json_path: str):
 
 def initialize_anchor1_memory(session: AnchorSession, memory_data):
     """Attach memory nodes to the session in‑place (idempotent)."""
-    if not hasattr(session, "memory_orbit"):
-        session.memory_orbit = []
-    existing_ids = {n.get("id") for n in session.memory_orbit if isinstance(n, dict)}
-    for node in memory_data:
-        if isinstance(node, dict) and node.get("id") not in existing_ids:
-            session.memory_orbit.append(node)
+    # read the lazy slot directly so an empty load allocates nothing
+    existing_ids = {n.get("id") for n in session._memory_orbit or () if isinstance(n, dict)}
+    new_nodes = [n for n in memory_data if isinstance(n, dict) and n.get("id") not in existing_ids]
+    if new_nodes:
+        session.memory_orbit.extend(new_nodes)
 
 # Lazy node‑loader: fetch cluster file on demand
 
@@ -100,8 +100,9 @@ def get_anchor_state(session: AnchorSession) -> Dict[str, Any]:
     state.update({
         "id": str(uuid.uuid4()),
         "tick": session.ticks,
-        "last_behavior": session.behavior_log[-1] if getattr(session, "behavior_log", []) else None,
-        "memory_nodes": getattr(session, "memory_orbit", []),
+        # lazy slots are read directly so diagnostics never allocate them
+        "last_behavior": session._behavior_log[-1] if session._behavior_log else None,
+        "memory_nodes": session._memory_orbit or [],
     })
     return state
 
@@ -144,42 +145,24 @@ def conditional_anchor_response(session: AnchorSession, input_text: str) -> Dict
 
     show_diag = session.is_in_chaos() or diagnostics_requested
     # --------------------------------------------------
-    
-diagnostics_requested = (
-        lower_txt.startswith("::diag") or
-        any(kw in lower_txt for kw in (
-            "diagnose",
-            "reveal state",
-            "dump raw vector",
-            "personality vector",
-            "persona vector",
-            "handoff log",
-            "chaos response"
-        ))
-)
-# strip meta-prefix if present
-if lower_txt.startswith("::diag"):
-    input_text = input_text[len("::diag"):].lstrip()
-    lower_txt = input_text.lower()
-
-    )
-    show_diag = session.is_in_chaos() or diagnostics_requested  # type: ignore[attr-defined]
 
     if show_diag:
-        state = get_anchor_state(session)
-        # Always attach numeric‑narrative anchor vector
-        state["anchor_narrative"] = _format_anchor_vector(state.get("core_vector") or {})
-        # Attach personality narrative if specifically requested
-        if "personality vector" in lower_txt or "persona vector" in lower_txt:
-            state["personality_narrative"] = _format_personality(state.get("personality_vector") or {})
+        with span("diagnostics"):
+            state = get_anchor_state(session)
+            # Always attach numeric‑narrative anchor vector
+            state["anchor_narrative"] = _format_anchor_vector(state.get("core_vector") or {})
+            # Attach personality narrative if specifically requested
+            if "personality vector" in lower_txt or "persona vector" in lower_txt:
+                state["personality_narrative"] = _format_personality(state.get("personality_vector") or {})
         return state
 
     # Normal path → return natural reply only
-    return {
-        "reply": _generate_reply(session, input_text),
-        "tick": session.ticks,
-        "status": "chaos" if session.is_in_chaos() else "stable"
-    }
+    with span("reply"):
+        return {
+            "reply": _generate_reply(session, input_text),
+            "tick": session.ticks,
+            "status": "chaos" if session.is_in_chaos() else "stable"
+        }
 
 # ───────────────────────────────────────────────────────────────────────────────
 #  Compatibility wrapper for api_interface / FastAPI routes
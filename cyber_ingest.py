@@ -0,0 +1,465 @@
+"""
+cyber_ingest.py
+---------------
+Streaming SOC ingestion for the cyber persona.
+
+• Reads alert / log events as JSONL from files or stdin
+• Scores each event against the cyber drift lexicon, weighted by the seed's
+  `alert_thresholds` (shorter time_to_response → heavier event)
+• Aggregates events in tumbling time windows per (session_id, src_ip)
+• Turns every closed window into ONE AnchorSession.tick(); playbooks are
+  applied through plugins_cyber_plugin.Plugin, whose scheduler then drives
+  rollback / soft-learn
+• Event time drives window closing but is not trusted blindly: stamps more
+  than --max-skew ahead of the wall clock are clamped to it, and a jump of
+  more than --max-skew past the newest event only advances the watermark
+  once a few events agree, so one bogus timestamp cannot stall the stream
+• Memory is bounded: open windows, resident sessions, the scoring cache and
+  per-session behaviour logs all have caps, and expired whitelist entries
+  are dropped. A session evicted while it still has open windows is rebuilt
+  from the seed when they close (counted as "recreated"; raise
+  --max-sessions if that is non-zero)
+
+Usage:
+    python cyber_ingest.py alerts.jsonl [more.jsonl ...]
+    tail -F eve.json | python cyber_ingest.py - --window 30 --whitelist-learn
+
+Recognised event fields (first match wins):
+    time      ts | timestamp | time         (epoch seconds or ISO-8601)
+    session   session_id                    (default: --session)
+    source    src_ip | source_ip | src
+    severity  severity | level | alert.severity  (critical/high/medium/low
+                                                  or 1..4, 1 = critical)
+    text      message | msg | alert.signature | signature
+    playbook  playbook | category           (must be one of the seed's
+                                             professional_kit.ir_playbooks)
+"""
+import argparse, json, math, os, re, sys, time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from anchor_core_engine import AnchorSession, ANCHOR_KEYS
+from plugins_cyber_plugin import Plugin
+from seed import load_json
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SEED = os.path.join(_HERE, "CyberSec_seed.json")
+DEFAULT_LEXICON = os.path.join(_HERE, "CyberSec_Consequence_drift.json")
+
+SEVERITIES = ("low", "medium", "high", "critical")        # index == rank
+_SEV_RANK = {name: i for i, name in enumerate(SEVERITIES)}
+_NUMERIC_SEV = {1: 3, 2: 2, 3: 1, 4: 0}                   # Suricata-style 1 = worst
+_ALIASES = {"Instability": "Fear", "Stability": "Safety"}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_ZERO = (0.0, 0.0, 0.0, 0.0)
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Scoring
+# ───────────────────────────────────────────────────────────────────────────────
+
+class CyberLexicon:
+    """
+    Phrase → anchor-delta lookup. Phrases are matched on lower-cased word
+    tokens, so "SQL Injection" hits "sql-injection attempt" as well.
+    """
+
+    def __init__(self, mapping: Dict[str, Dict[str, float]], cache_size: int = 65536):
+        self._phrases = {}          # first token -> [(token tuple, vector)]
+        for phrase, raw in mapping.items():
+            vec = [0.0] * len(ANCHOR_KEYS)
+            for k, v in (raw or {}).items():
+                k = _ALIASES.get(k, k)
+                if k in ANCHOR_KEYS:
+                    vec[ANCHOR_KEYS.index(k)] = float(v)
+            toks = tuple(_TOKEN_RE.findall(phrase.lower()))
+            if toks and any(vec):
+                self._phrases.setdefault(toks[0], []).append((toks, tuple(vec)))
+        for cands in self._phrases.values():
+            cands.sort(key=lambda c: -len(c[0]))               # longest match first
+        self.score = lru_cache(maxsize=cache_size)(self._score)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "CyberLexicon":
+        return cls(load_json(path), **kwargs)
+
+    def __len__(self):
+        return sum(len(c) for c in self._phrases.values())
+
+    def _score(self, text: str):
+        """Summed anchor deltas of every lexicon phrase found in *text*."""
+        toks = _TOKEN_RE.findall(text.lower())
+        phrases = self._phrases
+        f = s = t = c = 0.0
+        hit = False
+        i, n = 0, len(toks)
+        while i < n:
+            cands = phrases.get(toks[i])
+            step = 1
+            if cands:
+                for ptoks, vec in cands:
+                    m = len(ptoks)
+                    if m == 1 or tuple(toks[i:i + m]) == ptoks:
+                        f += vec[0]; s += vec[1]; t += vec[2]; c += vec[3]
+                        hit, step = True, m
+                        break
+            i += step
+        return (f, s, t, c) if hit else _ZERO
+
+
+def severity_weights(alert_thresholds: Dict[str, Dict[str, Any]]):
+    """
+    Per-rank event weight from the seed's alert_thresholds:
+    sqrt(fastest time_to_response / this level's time_to_response), so
+    critical → 1.0 and each slower tier counts for less.
+    """
+    ttr = {name: float((alert_thresholds.get(name) or {}).get("time_to_response", 0) or 0)
+           for name in SEVERITIES}
+    fastest = min((v for v in ttr.values() if v > 0), default=0.0)
+    if not fastest:
+        return (0.25, 0.5, 0.75, 1.0)
+    return tuple(math.sqrt(fastest / ttr[name]) if ttr[name] > 0 else 1.0
+                 for name in SEVERITIES)
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Event field helpers
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _event_time(ev: Dict[str, Any], now: float) -> float:
+    ts = ev.get("ts") or ev.get("timestamp") or ev.get("time")
+    if ts is None:
+        return now
+    if isinstance(ts, (int, float)):
+        ts = float(ts)
+    else:
+        try:
+            ts = float(ts)
+        except (TypeError, ValueError):
+            try:
+                ts = _parse_iso(ts)
+            except (TypeError, ValueError, OverflowError):
+                return now
+    return ts if math.isfinite(ts) else now
+
+
+_ISO_RE = re.compile(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?(.*)")
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_second(second: str, tz: str) -> float:
+    return datetime.fromisoformat(second + tz).timestamp()
+
+
+def _parse_iso(ts: str) -> float:
+    # events arrive in bursts sharing the same second; cache on that part
+    m = _ISO_RE.fullmatch(ts)
+    if m is None:
+        return datetime.fromisoformat(ts).timestamp()
+    second, frac, tz = m.groups()
+    return _parse_iso_second(second, tz) + (float(frac) if frac else 0.0)
+
+
+def _severity_rank(ev: Dict[str, Any]) -> int:
+    sev = ev.get("severity") or ev.get("level")
+    if sev is None:
+        alert = ev.get("alert")
+        sev = alert.get("severity") if isinstance(alert, dict) else None
+    if isinstance(sev, str):
+        rank = _SEV_RANK.get(sev.lower())
+        if rank is not None:
+            return rank
+        try:
+            sev = int(sev)
+        except ValueError:
+            return 0
+    if isinstance(sev, int):
+        return _NUMERIC_SEV.get(sev, 3 if sev < 1 else 0)
+    return 0
+
+
+def _event_text(ev: Dict[str, Any]) -> str:
+    text = ev.get("message") or ev.get("msg")
+    if not text:
+        alert = ev.get("alert")
+        text = (alert.get("signature") if isinstance(alert, dict) else None) or ev.get("signature")
+    return text if isinstance(text, str) else ""
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Windowed ingestion
+# ───────────────────────────────────────────────────────────────────────────────
+
+class CyberIngestor:
+    """
+    Feed events with `feed()` / `feed_lines()`; call `close()` at end of
+    stream. Every closed (window, session_id, src_ip) becomes one tick and,
+    when *emit* is given, one summary record passed to it.
+    """
+
+    def __init__(self, seed: Dict[str, Any], lexicon: CyberLexicon,
+                 window: float = 60.0, lateness: float = 5.0,
+                 default_session: str = "soc",
+                 playbook_severity: str = "high",
+                 rollback_instability: float = 0.5,
+                 whitelist_learn: bool = False,
+                 max_skew: float = 300.0,
+                 jump_confirm: int = 3,
+                 max_open_windows: int = 200_000,
+                 max_sessions: int = 10_000,
+                 emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_evict: Optional[Callable[[str, AnchorSession], None]] = None):
+        self.lexicon = lexicon
+        self.window = float(window)
+        self.lateness = float(lateness)
+        self.default_session = default_session
+        self.playbook_rank = _SEV_RANK[playbook_severity]
+        self.rollback_instability = rollback_instability
+        self.whitelist_learn = whitelist_learn
+        self.max_skew = float(max_skew)
+        self.jump_confirm = max(1, jump_confirm)
+        self.max_open_windows = max_open_windows
+        self.max_sessions = max_sessions
+        self.emit = emit
+        self.on_evict = on_evict
+
+        self.plugin = Plugin()                  # stateless; shared by all sessions
+        self.playbooks = frozenset((seed.get("professional_kit") or {}).get("ir_playbooks", ()))
+        self._weights = severity_weights(seed.get("alert_thresholds") or {})
+        core = seed.get("core_vector_default") or seed.get("last_known_vector") or {}
+        self._core_default = {_ALIASES.get(k, k): v for k, v in core.items()}
+        self._persona_style = seed.get("persona_style")
+
+        self._sessions = OrderedDict()          # session_id -> AnchorSession (LRU)
+        self._windows = {}                      # start -> {(sid, ip): agg}
+        self._open = 0
+        self._max_ts = float("-inf")
+        self._jumps = 0                         # events seen beyond _max_ts + max_skew
+        self._closed_upto = float("-inf")       # every window ending <= this is closed
+        self._next_due = float("inf")           # end of the oldest open window
+        self.stats = dict(events=0, scored=0, late=0, future=0, whitelisted=0, malformed=0,
+                          windows=0, ticks=0, playbooks=0, evicted=0, recreated=0)
+
+    # ---------- sessions ---------- #
+    def session(self, sid: str) -> AnchorSession:
+        sess = self._sessions.get(sid)
+        if sess is None:
+            sess = AnchorSession()
+            sess.id = sid
+            sess.core.assign(self._core_default)
+            if self._persona_style:
+                sess.persona_style = self._persona_style
+            sess.plugin = self.plugin
+            self.plugin.on_session_start(sess)
+            self._sessions[sid] = sess
+            if len(self._sessions) > self.max_sessions:
+                old_sid, old = self._sessions.popitem(last=False)
+                self.stats["evicted"] += 1
+                if self.on_evict:
+                    self.on_evict(old_sid, old)
+        return sess
+
+    # ---------- ingestion ---------- #
+    def feed_lines(self, lines: Iterable) -> None:
+        loads, feed = json.loads, self.feed
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                ev = loads(line)
+            except ValueError:
+                self.stats["malformed"] += 1
+                continue
+            if isinstance(ev, dict):
+                feed(ev)
+            else:
+                self.stats["malformed"] += 1
+
+    def feed(self, ev: Dict[str, Any], now: Optional[float] = None) -> None:
+        stats = self.stats
+        stats["events"] += 1
+        if now is None:
+            now = time.time()
+        ts = _event_time(ev, now)
+        if ts > now + self.max_skew:
+            stats["future"] += 1
+            ts = now
+        start = ts - ts % self.window
+        if start + self.window <= self._closed_upto:
+            stats["late"] += 1
+            return
+
+        sid = ev.get("session_id") or self.default_session
+        ip = ev.get("src_ip") or ev.get("source_ip") or ev.get("src") or "-"
+        pb = ev.get("playbook") or ev.get("category")
+        if not (isinstance(sid, str) and isinstance(ip, str) and (pb is None or isinstance(pb, str))):
+            stats["malformed"] += 1
+            return
+        sess = self._sessions.get(sid) or self.session(sid)
+        until = sess.dynamic_whitelist.get(ip)
+        if until is not None:
+            if until > sess.ticks:
+                stats["whitelisted"] += 1
+                return
+            del sess.dynamic_whitelist[ip]
+
+        rank = _severity_rank(ev)
+        f, s, t, c = self.lexicon.score(_event_text(ev))
+        if f or s or t or c:
+            stats["scored"] += 1
+
+        bucket = self._windows.get(start)
+        if bucket is None:
+            bucket = self._windows[start] = {}
+            if start + self.window < self._next_due:
+                self._next_due = start + self.window
+        key = (sid, ip)
+        agg = bucket.get(key)
+        if agg is None:
+            agg = bucket[key] = [0, 0.0, 0.0, 0.0, 0.0, 0, None]
+            self._open += 1
+        w = self._weights[rank]
+        agg[0] += 1
+        agg[1] += f * w; agg[2] += s * w; agg[3] += t * w; agg[4] += c * w
+        if rank > agg[5]:
+            agg[5] = rank
+        if pb and pb in self.playbooks:
+            if agg[6] is None:
+                agg[6] = set()
+            agg[6].add(pb)
+
+        if ts > self._max_ts:
+            if ts - self._max_ts > self.max_skew and self._jumps + 1 < self.jump_confirm:
+                self._jumps += 1                # far jump ahead: wait for others to agree
+            else:
+                self._max_ts = ts
+                self._jumps = 0
+                if ts - self.lateness >= self._next_due:
+                    self.flush(ts - self.lateness)
+        if self._open > self.max_open_windows:
+            self.flush(min(self._windows) + self.window)       # shed the oldest window
+
+    # ---------- window close ---------- #
+    def flush(self, watermark: float = float("inf")) -> None:
+        """Close every window that ends at or before *watermark*."""
+        for start in sorted(self._windows):
+            end = start + self.window
+            if end > watermark:
+                break
+            bucket = self._windows.pop(start)
+            self._open -= len(bucket)
+            self._closed_upto = max(self._closed_upto, end)
+            self.stats["windows"] += 1
+            for (sid, ip), agg in bucket.items():
+                self._tick(sid, ip, start, agg)
+        self._next_due = min(self._windows, default=float("inf")) + self.window
+
+    def close(self) -> None:
+        self.flush()
+
+    def _tick(self, sid: str, ip: str, start: float, agg: list) -> None:
+        count, rank = agg[0], agg[5]
+        if sid not in self._sessions:
+            # evicted while it still had open windows: state starts over
+            self.stats["recreated"] += 1
+        sess = self.session(sid)
+        self._sessions.move_to_end(sid)
+        # mean per-event delta, amplified sub-linearly by volume
+        gain = (1.0 + math.log10(count)) / count
+        updates = {k: max(-1.0, min(1.0, agg[i + 1] * gain))
+                   for i, k in enumerate(ANCHOR_KEYS)}
+
+        sess.last_src_ip = ip
+        sess.tick(updates, positive=rank < self.playbook_rank)
+        wl = sess.dynamic_whitelist
+        if wl:
+            for old_ip in [k for k, until in wl.items() if until <= sess.ticks]:
+                del wl[old_ip]
+        log = sess.behavior_log                 # tick() may have trimmed it
+        mark = len(log)
+        self.plugin.on_tick(sess)
+        self.stats["ticks"] += 1
+
+        fired = []
+        if agg[6] and rank >= self.playbook_rank:
+            for name in sorted(agg[6]):
+                if name in sess.active_controls:
+                    continue
+                playbook = {
+                    "id": name,
+                    "steps": [name],
+                    "src_ip": ip,
+                    "adaptive_threshold": {
+                        "instability_max": self.rollback_instability,
+                        "whitelist_learn": self.whitelist_learn,
+                    },
+                }
+                sess.activate_control(name)
+                self.plugin.on_playbook_applied(sess, playbook)
+                sess.behavior_log.append(f"[Playbook] {name} applied for {ip}")
+                fired.append(name)
+            self.stats["playbooks"] += len(fired)
+
+        if self.emit is not None:
+            self.emit({
+                "session_id": sid,
+                "src_ip": ip,
+                "window_start": start,
+                "events": count,
+                "severity": SEVERITIES[rank],
+                "core": sess.core.copy(),
+                "in_chaos": sess.is_in_chaos(),
+                "playbooks": fired,
+                "hooks": [e for e in log[mark:] if e.startswith(("[Rollback]", "[Soft-learn]"))],
+            })
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  CLI
+# ───────────────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Windowed SOC event ingestion for the cyber persona")
+    ap.add_argument("inputs", nargs="*", default=["-"], help="JSONL files ('-' = stdin)")
+    ap.add_argument("--seed", default=DEFAULT_SEED)
+    ap.add_argument("--lexicon", default=DEFAULT_LEXICON)
+    ap.add_argument("--window", type=float, default=60.0, help="window length (s)")
+    ap.add_argument("--lateness", type=float, default=5.0, help="allowed event lateness (s)")
+    ap.add_argument("--session", default="soc", help="session_id for events without one")
+    ap.add_argument("--playbook-severity", choices=SEVERITIES, default="high")
+    ap.add_argument("--rollback-instability", type=float, default=0.5)
+    ap.add_argument("--whitelist-learn", action="store_true")
+    ap.add_argument("--max-skew", type=float, default=300.0,
+                    help="max trusted clock skew / forward time jump (s)")
+    ap.add_argument("--max-open-windows", type=int, default=200_000)
+    ap.add_argument("--max-sessions", type=int, default=10_000)
+    ap.add_argument("--quiet", action="store_true", help="no per-tick records, stats only")
+    args = ap.parse_args(argv)
+
+    out = sys.stdout
+    emit = None if args.quiet else (lambda rec: out.write(json.dumps(rec) + "\n"))
+    ingestor = CyberIngestor(
+        load_json(args.seed), CyberLexicon.from_file(args.lexicon),
+        window=args.window, lateness=args.lateness, default_session=args.session,
+        playbook_severity=args.playbook_severity,
+        rollback_instability=args.rollback_instability,
+        whitelist_learn=args.whitelist_learn, max_skew=args.max_skew,
+        max_open_windows=args.max_open_windows, max_sessions=args.max_sessions,
+        emit=emit,
+    )
+
+    t0 = time.perf_counter()
+    for name in args.inputs:
+        if name == "-":
+            ingestor.feed_lines(sys.stdin.buffer)
+        else:
+            with open(name, "rb") as f:
+                ingestor.feed_lines(f)
+    ingestor.close()
+    elapsed = time.perf_counter() - t0
+
+    stats = dict(ingestor.stats, seconds=round(elapsed, 3),
+                 events_per_s=round(ingestor.stats["events"] / elapsed) if elapsed else None)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
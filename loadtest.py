@@ -0,0 +1,307 @@
+"""
+loadtest.py
+-----------
+Reproducible load generator for the Anchor HTTP services (main.py / bridge.py).
+
+• Drives /send_input, /run_tick and /get_full_state with N concurrent workers
+• Synthetic traffic (session-id cardinality + weighted endpoint mix) or
+  replay of a JSONL traffic file
+• bridge.py serves a single in-process session and has no /get_full_state:
+  its default mix is send_input/run_tick only, and --sessions only changes
+  anything against main.py
+• Can start the server itself (uvicorn subprocess, REDIS_URL=memory://)
+• Reports throughput, p50/p95/p99 latency and error rates as JSON
+
+Examples:
+    python loadtest.py --serve main --requests 5000 --concurrency 16
+    python loadtest.py --serve bridge --requests 2000
+    python loadtest.py --url http://localhost:8000 --duration 30 \\
+        --sessions 1000 --mix send_input=6,run_tick=3,get_full_state=1
+    python loadtest.py --serve main --replay traffic.jsonl --out run.json
+
+Replay lines look like
+    {"endpoint": "/send_input", "body": {"session_id": "a", "input": "hello"}}
+    {"endpoint": "/get_full_state", "params": {"session_id": "a"}}
+"method" is optional (GET for /get_full_state and /, POST otherwise).
+"""
+import argparse, itertools, json, math, os, random, socket, subprocess, sys, threading, time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+ENDPOINTS = ("send_input", "run_tick", "get_full_state")
+APP_ENDPOINTS = {
+    "main": ENDPOINTS,
+    "bridge": ("send_input", "run_tick"),
+}
+DEFAULT_MIXES = {
+    "main": "send_input=6,run_tick=3,get_full_state=1",
+    "bridge": "send_input=7,run_tick=3",
+}
+DEFAULT_MIX = DEFAULT_MIXES["main"]
+DEFAULT_INPUTS = (
+    "hello",
+    "I feel uneasy about tomorrow",
+    "Let's plan the next step",
+    "diagnose",
+    "::diag reveal state",
+    "What should I focus on?",
+)
+_GET_PATHS = ("/", "/get_full_state")
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Traffic sources
+# ───────────────────────────────────────────────────────────────────────────────
+
+def parse_mix(spec: str, app: str = "main") -> Dict[str, float]:
+    """'send_input=6,run_tick=3' → {'send_input': 6.0, 'run_tick': 3.0}"""
+    allowed = APP_ENDPOINTS[app]
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip().lstrip("/")
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint in mix: {name!r}")
+        if name not in allowed:
+            raise ValueError(f"{app} has no /{name} endpoint")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("endpoint mix must have a positive weight")
+    return mix
+
+
+def synthetic_requests(mix: Dict[str, float], sessions: int, inputs: List[str],
+                       seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Endless stream of request specs drawn from *mix* over *sessions* ids."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while True:
+        sid = f"lt-{rng.randrange(sessions)}"
+        name = rng.choices(names, weights)[0]
+        if name == "send_input":
+            yield {"endpoint": "/send_input",
+                   "body": {"session_id": sid, "input": rng.choice(inputs)}}
+        elif name == "run_tick":
+            yield {"endpoint": "/run_tick",
+                   "body": {"session_id": sid, "anchor_updates": {
+                       k: round(rng.uniform(-0.05, 0.05), 4)
+                       for k in ("Fear", "Safety", "Time", "Choice")}}}
+        else:
+            yield {"endpoint": "/get_full_state", "params": {"session_id": sid}}
+
+
+def replay_requests(path: str, loop: bool = False) -> Iterator[Dict[str, Any]]:
+    """Request specs from a JSONL file (blank lines and # comments skipped)."""
+    while True:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield json.loads(line)
+        if not loop:
+            return
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Runner
+# ───────────────────────────────────────────────────────────────────────────────
+
+def percentile(sorted_vals: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_vals)))
+    return sorted_vals[min(rank, len(sorted_vals)) - 1]
+
+
+def _summarise(latencies: List[float], errors: int) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    n = len(lat)
+    ms = lambda v: None if v is None else round(v * 1000, 3)
+    return {
+        "requests": n,
+        "errors": errors,
+        "error_rate": round(errors / n, 6) if n else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(lat) / n) if n else None,
+            "p50": ms(percentile(lat, 50)),
+            "p95": ms(percentile(lat, 95)),
+            "p99": ms(percentile(lat, 99)),
+            "max": ms(lat[-1]) if n else None,
+        },
+    }
+
+
+def run_load(base_url: str, source: Iterator[Dict[str, Any]], concurrency: int = 8,
+             total: Optional[int] = None, duration: Optional[float] = None,
+             timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Fire requests from *source* at *base_url* until *total* requests were sent,
+    *duration* seconds elapsed, or the source ran dry. Returns the JSON report.
+    """
+    base_url = base_url.rstrip("/")
+    if total is not None:
+        source = itertools.islice(source, total)
+    src_lock = threading.Lock()
+    deadline = time.perf_counter() + duration if duration else None
+    results = []                    # (endpoint, seconds, status | error-name)
+
+    def _worker():
+        http = requests.Session()
+        local = []
+        while deadline is None or time.perf_counter() < deadline:
+            with src_lock:
+                spec = next(source, None)
+            if spec is None:
+                break
+            path = spec.get("endpoint", "/")
+            method = spec.get("method") or ("GET" if path in _GET_PATHS else "POST")
+            t0 = time.perf_counter()
+            try:
+                r = http.request(method, base_url + path, json=spec.get("body"),
+                                 params=spec.get("params"), timeout=timeout)
+                outcome = r.status_code
+            except requests.RequestException as exc:
+                outcome = type(exc).__name__
+            local.append((path, time.perf_counter() - t0, outcome))
+        results.extend(local)       # list.extend is atomic under the GIL
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=_worker, daemon=True) for _ in range(concurrency)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    is_error = lambda o: not isinstance(o, int) or o >= 400
+    by_ep = defaultdict(list)
+    for path, secs, outcome in results:
+        by_ep[path].append((secs, outcome))
+
+    report = {
+        "target": base_url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+    }
+    report.update(_summarise([r[1] for r in results], sum(is_error(r[2]) for r in results)))
+    report["status_codes"] = dict(Counter(str(r[2]) for r in results))
+    report["by_endpoint"] = {
+        path: _summarise([s for s, _ in rows], sum(is_error(o) for _, o in rows))
+        for path, rows in sorted(by_ep.items())
+    }
+    return report
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Local server
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_local_server(module: str = "main", port: Optional[int] = None,
+                       wait: float = 20.0):
+    """Launch `uvicorn <module>:app` with the in-memory Redis stand-in."""
+    port = port or _free_port()
+    env = dict(os.environ, REDIS_URL="memory://")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    stop_at = time.monotonic() + wait
+    while time.monotonic() < stop_at:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            requests.get(url + "/", timeout=0.5)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"server did not come up on {url} within {wait}s")
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  CLI
+# ───────────────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load-test the Anchor HTTP services")
+    tgt = ap.add_mutually_exclusive_group(required=True)
+    tgt.add_argument("--url", help="base URL of a running server")
+    tgt.add_argument("--serve", choices=("main", "bridge"),
+                     help="start this app locally (REDIS_URL=memory://)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--requests", type=int, help="stop after this many requests")
+    ap.add_argument("--duration", type=float, help="stop after this many seconds")
+    ap.add_argument("--app", choices=tuple(APP_ENDPOINTS),
+                    help="app behind --url (default main; implied by --serve)")
+    ap.add_argument("--sessions", type=int, default=100,
+                    help="distinct session ids (main only; bridge has one session)")
+    ap.add_argument("--mix", help="weighted endpoint mix (default depends on the app)")
+    ap.add_argument("--inputs", help="text file, one /send_input message per line")
+    ap.add_argument("--replay", help="JSONL traffic file to replay")
+    ap.add_argument("--loop", action="store_true", help="replay the file repeatedly")
+    ap.add_argument("--seed", type=int, help="RNG seed for synthetic traffic")
+    ap.add_argument("--timeout", type=float, default=10.0)
+    ap.add_argument("--label", help="free-form label stored in the report")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+    if args.serve and args.app and args.app != args.serve:
+        ap.error("--app must match --serve")
+    app = args.serve or args.app or "main"
+    mix = None
+    if not args.replay:
+        try:
+            mix = parse_mix(args.mix or DEFAULT_MIXES[app], app)
+        except ValueError as exc:
+            ap.error(str(exc))
+
+    if args.replay:
+        source = replay_requests(args.replay, loop=args.loop)
+    else:
+        if args.requests is None and args.duration is None:
+            ap.error("synthetic traffic needs --requests or --duration")
+        inputs = list(DEFAULT_INPUTS)
+        if args.inputs:
+            with open(args.inputs, "r", encoding="utf-8") as f:
+                inputs = [ln.rstrip("\n") for ln in f if ln.strip()]
+        source = synthetic_requests(mix, args.sessions, inputs, args.seed)
+
+    proc = None
+    url = args.url
+    if args.serve:
+        proc, url = start_local_server(args.serve)
+    try:
+        report = run_load(url, source, args.concurrency, args.requests,
+                          args.duration, args.timeout)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report["config"] = {
+        "label": args.label,
+        "app": app,
+        "served": bool(args.serve),
+        "sessions": args.sessions if mix and app == "main" else None,
+        "mix": mix,
+        "replay": args.replay,
+    }
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+    # non-zero exit when anything failed, so CI can gate on it
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+local_redis.py
+--------------
+In-process stand-in for the small slice of Redis that Anchor uses.
+
+• LocalRedis       – thread-safe, synchronous (redis.Redis-like), including
+                     scan_iter() and non-transactional pipelines
+• AsyncLocalRedis  – awaitable facade (redis.asyncio-like) over a LocalRedis
+
+Values are kept as given (main.py talks to Redis with decode_responses=True,
+so they are str). TTLs are honoured lazily on access. Select it from
+main.py with REDIS_URL=memory://
+"""
+import fnmatch, threading, time
+from typing import Optional
+
+
+class LocalRedis:
+    def __init__(self):
+        self._data = {}
+        self._expires = {}          # key -> monotonic deadline
+        self._lock = threading.Lock()
+
+    # ---------- internals ---------- #
+    def _alive(self, key) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+
+    # ---------- string commands ---------- #
+    def get(self, name) -> Optional[str]:
+        with self._lock:
+            return self._data[name] if self._alive(name) else None
+
+    def set(self, name, value, ex=None, px=None, nx=False, xx=False, keepttl=False):
+        with self._lock:
+            exists = self._alive(name)
+            if (nx and exists) or (xx and not exists):
+                return None
+            self._data[name] = value
+            if ex is not None:
+                self._expires[name] = time.monotonic() + ex
+            elif px is not None:
+                self._expires[name] = time.monotonic() + px / 1000.0
+            elif not keepttl:
+                self._expires.pop(name, None)
+            return True
+
+    def delete(self, *names) -> int:
+        with self._lock:
+            n = 0
+            for name in names:
+                if self._alive(name):
+                    n += 1
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+            return n
+
+    def exists(self, *names) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._alive(name))
+
+    # ---------- expiry ---------- #
+    def pttl(self, name) -> int:
+        """Milliseconds left; -1 if no expiry, -2 if missing (Redis semantics)."""
+        with self._lock:
+            if not self._alive(name):
+                return -2
+            deadline = self._expires.get(name)
+            if deadline is None:
+                return -1
+            return max(0, int((deadline - time.monotonic()) * 1000))
+
+    def ttl(self, name) -> int:
+        ms = self.pttl(name)
+        return ms if ms < 0 else (ms + 999) // 1000
+
+    # ---------- keyspace ---------- #
+    def scan_iter(self, match=None, count=None):
+        """Iterate keys (optionally glob-filtered); *count* is accepted for API parity."""
+        with self._lock:
+            keys = list(self._data)
+        for key in keys:
+            if match is None or fnmatch.fnmatchcase(key, match):
+                with self._lock:
+                    alive = self._alive(key)
+                if alive:
+                    yield key
+
+    def pipeline(self, transaction=False):
+        return LocalPipeline(self)
+
+    # ---------- server ---------- #
+    def dbsize(self) -> int:
+        with self._lock:
+            return sum(1 for k in list(self._data) if self._alive(k))
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+    def ping(self):
+        return True
+
+
+class LocalPipeline:
+    """Buffers commands and runs them on execute() (no MULTI semantics)."""
+
+    def __init__(self, store: LocalRedis):
+        self._store = store
+        self._calls = []
+
+    def __getattr__(self, name):
+        fn = getattr(self._store, name)
+
+        def _queue(*args, **kwargs):
+            self._calls.append((fn, args, kwargs))
+            return self
+        return _queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [fn(*args, **kwargs) for fn, args, kwargs in calls]
+
+    def reset(self):
+        self._calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+
+class AsyncLocalRedis:
+    """Awaitable wrapper so LocalRedis can replace redis.asyncio clients."""
+
+    def __init__(self, store: Optional[LocalRedis] = None):
+        self.store = store or LocalRedis()
+
+    async def get(self, name):
+        return self.store.get(name)
+
+    async def set(self, name, value, **kwargs):
+        return self.store.set(name, value, **kwargs)
+
+    async def delete(self, *names):
+        return self.store.delete(*names)
+
+    async def exists(self, *names):
+        return self.store.exists(*names)
+
+    async def pttl(self, name):
+        return self.store.pttl(name)
+
+    async def ttl(self, name):
+        return self.store.ttl(name)
+
+    async def dbsize(self):
+        return self.store.dbsize()
+
+    async def flushdb(self):
+        return self.store.flushdb()
+
+    async def ping(self):
+        return True
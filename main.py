@@ -4,6 +4,8 @@
 • POST‑only ingress for user input (/send_input, /run_tick)
 • NEW: GET /get_full_state  → returns full Anchor snapshot
 • Redis persistence so sessions survive container restarts
+• REDIS_URL=memory:// swaps in local_redis (load tests / local dev)
+• ANCHOR_TRACE=1 records per-stage spans and keeps slow-request traces (tracing.py)
 """
 
 import os, json
@@ -16,35 +18,45 @@ from api_interface import AnchorAPI
 from seed import apply_seed
 from seed_registry import resolve_seed
 from bridge_utils import get_anchor_state
+from tracing import install as install_tracing, span, annotate
 
 load_dotenv()
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-redis_client = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+if REDIS_URL.startswith("memory://"):
+    # local in-process stand-in (load tests, dev runs without Redis)
+    from local_redis import AsyncLocalRedis
+    redis_client = AsyncLocalRedis()
+else:
+    redis_client = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
 
 app = FastAPI(title="Anchor1 API (Render)", version="1.1")
+install_tracing(app, service="main")
 
 # ---------- Session helpers ---------- #
 async def _get_session(sid: str = "default") -> AnchorSession:
     """Load session from Redis or bootstrap from seed registry."""
     key = f"anchor:{sid}"
-    cached = await redis_client.get(key)
+    annotate("session_id", sid)
+    with span("redis.get"):
+        cached = await redis_client.get(key)
     if cached:
-        sess = AnchorSession()
-        sess.import_state(json.loads(cached))
+        with span("import_state"):
+            sess = AnchorSession()
+            sess.import_state(json.loads(cached))
     else:
-        sess = AnchorSession()
-        seed_id = resolve_seed(sid) or sid
-        apply_seed(sess, seed_id, seeds_dir="seeds")
+        with span("apply_seed"):
+            sess = AnchorSession()
+            seed_id = resolve_seed(sid) or sid
+            apply_seed(sess, seed_id, seeds_dir="seeds")
     return sess
 
 async def _save_session(sid: str, session: AnchorSession):
     """Persist session to Redis (24 h TTL)."""
-    await redis_client.set(
-        f"anchor:{sid}",
-        json.dumps(session.export_state()),
-        ex=60 * 60 * 24,
-    )
+    with span("export_state"):
+        blob = json.dumps(session.export_state())
+    with span("redis.set"):
+        await redis_client.set(f"anchor:{sid}", blob, ex=60 * 60 * 24)
 
 # ---------- Routes ---------- #
 @app.get("/")
@@ -56,9 +68,11 @@ async def send_input(request: Request):
     data = await request.json()
     sid = data.get("session_id", "default")
     session = await _get_session(sid)
-    result = AnchorAPI(session).send_input(data.get("input", ""))
+    with span("send_input"):
+        result = AnchorAPI(session).send_input(data.get("input", ""))
     if data.get("show_full_state"):
-        result["full_state"] = get_anchor_state(session)
+        with span("get_anchor_state"):
+            result["full_state"] = get_anchor_state(session)
     await _save_session(sid, session)
     return result
 
@@ -67,7 +81,8 @@ async def run_tick(request: Request):
     data = await request.json()
     sid = data.get("session_id", "default")
     session = await _get_session(sid)
-    result = AnchorAPI(session).run_tick(data.get("anchor_updates", {}))
+    with span("run_tick"):
+        result = AnchorAPI(session).run_tick(data.get("anchor_updates", {}))
     await _save_session(sid, session)
     return result
 
@@ -75,4 +90,5 @@ async def run_tick(request: Request):
 async def get_full_state(session_id: str = "default"):
     """Return the complete Anchor snapshot for the given session_id."""
     session = await _get_session(session_id)
-    return get_anchor_state(session)
+    with span("get_anchor_state"):
+        return get_anchor_state(session)
@@ -36,6 +36,10 @@ class Plugin:
         # attach scheduler to session if not present
         if not hasattr(session, "cx_sched"):
             session.cx_sched = MiniScheduler()
+        if not hasattr(session, "dynamic_whitelist"):
+            session.dynamic_whitelist = {}      # src_ip -> expiry tick
+        if not hasattr(session, "last_src_ip"):
+            session.last_src_ip = None
 
     def on_tick(self, session):
         if hasattr(session, "cx_sched"):
@@ -50,6 +54,9 @@ class Plugin:
 
         target = float(thresh.get("instability_max", 1.0))
         learn  = bool(thresh.get("whitelist_learn", False))
+        # learn the source that raised the playbook, not whichever one
+        # happens to be last_src_ip 30 ticks from now
+        src_ip = playbook.get("src_ip") or session.last_src_ip
         job_id = f"{session.id}-pb-{playbook['id']}"
 
         # Repeat check every 5 ticks
@@ -62,10 +69,10 @@ class Plugin:
 
                 # Schedule soft-learn 30 ticks (~30 min) later
                 def _soft_learn():
-                    if learn and session.last_src_ip:
-                        session.dynamic_whitelist[session.last_src_ip] = session.ticks + 288
-                        session.behavior_log.append(f"[Soft-learn] {session.last_src_ip} whitelisted 24h")
-                    session.cx_sched.cancel(job_id + \"-soft\")
-                session.cx_sched.delay(30, _soft_learn, job_id + \"-soft\")
+                    if learn and src_ip:
+                        session.dynamic_whitelist[src_ip] = session.ticks + 288
+                        session.behavior_log.append(f"[Soft-learn] {src_ip} whitelisted 24h")
+                    session.cx_sched.cancel(job_id + "-soft")
+                session.cx_sched.delay(30, _soft_learn, job_id + "-soft")
 
         session.cx_sched.every(5, _rollback, job_id)
@@ -0,0 +1,402 @@
+"""
+redis_bulk.py
+-------------
+Bulk backup / restore / migration of the `anchor:<sid>` session keys
+written by main.py.
+
+• export  – SCAN keys, pipeline GET + PTTL, stream records into N gzip'd
+            NDJSON shards in parallel (one writer thread per shard)
+• import  – read shards in parallel, pipelined SETs that restore TTLs
+• migrate – Redis → Redis in one pass, no files
+• --upgrade runs snapshots through the UPGRADES chain (old version →
+  STATE_VERSION) during the transfer; --upgrade-fn adds a custom
+  `module:function` applied to every record afterwards
+
+Memory stays constant: keys move in fixed-size batches through a bounded
+queue, and shards are written / read as streams.
+
+Examples:
+    python redis_bulk.py export --url redis://host:6379/0 --out backup/ --shards 8
+    python redis_bulk.py import --url redis://new:6379/0 backup/*.ndjson.gz --upgrade
+    python redis_bulk.py migrate --url redis://old/0 --to redis://new/0 --upgrade
+
+Shard record (one JSON object per line):
+    {"key": "anchor:abc", "pttl": 81234567, "at": 1760000000000, "state": {...}}
+"pttl" is -1 for keys without expiry; "raw" replaces "state" when the value
+is not a JSON object. A record whose upgrade fails is kept unchanged and
+counted as "upgrade_failed".
+"""
+import argparse, copy, glob, gzip, importlib, json, os, queue, sys, threading, time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import redis
+
+from anchor_core_engine import STATE_VERSION, ANCHOR_KEYS
+
+DEFAULT_MATCH = "anchor:*"
+SHARD_PATTERN = "anchor-{:04d}.ndjson.gz"
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Snapshot upgrades
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _v0_to_v1(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-version snapshots: fill fields export_state() has always written."""
+    state = dict(state)
+    state.setdefault("core", {k: 0.5 for k in ANCHOR_KEYS})
+    state.setdefault("goal_vector", {})
+    state.setdefault("ticks", 0)
+    state.setdefault("identity_coherence", 1.0)
+    state.setdefault("goal_confidence", 0.0)
+    state.setdefault("memory_orbit", [])
+    state.setdefault("behavior_log", [])
+    state["version"] = 1
+    return state
+
+# from-version -> step producing from-version + 1; steps return a new dict
+# and must not modify their input
+UPGRADES: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    0: _v0_to_v1,
+}
+
+
+def upgrade_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Walk *state* up the UPGRADES chain to STATE_VERSION."""
+    if not isinstance(state, dict):
+        raise TypeError(f"snapshot is a {type(state).__name__}, not an object")
+    version = state.get("version", 0)
+    while version < STATE_VERSION:
+        step = UPGRADES.get(version)
+        if step is None:
+            raise ValueError(f"no upgrade registered from snapshot version {version}")
+        state = step(state)
+        version = state.get("version", version + 1)
+    return state
+
+
+def load_callable(spec: str) -> Callable:
+    """'package.module:function' → the function."""
+    mod_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"expected module:function, got {spec!r}")
+    return getattr(importlib.import_module(mod_name), attr)
+
+
+def make_transform(upgrade: bool = False, extra: Optional[Callable] = None):
+    """Per-record transform for export/import/migrate, or None."""
+    if not upgrade and extra is None:
+        return None
+
+    def _transform(state):
+        if upgrade:
+            state = upgrade_state(state)
+        if extra is not None:
+            # custom functions may edit in place; a failure must leave the
+            # caller's record untouched
+            state = extra(copy.deepcopy(state))
+        return state
+    return _transform
+
+
+def _apply(transform, state, stats=None):
+    """*transform*(state), or None (counted as upgrade_failed) if it raises."""
+    try:
+        return transform(state)
+    except Exception:
+        if stats is not None:
+            stats.add("upgrade_failed")
+        return None
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Redis helpers
+# ───────────────────────────────────────────────────────────────────────────────
+
+def connect(url: str):
+    """redis.Redis for *url*; memory:// gives a fresh local_redis stand-in."""
+    if url.startswith("memory://"):
+        from local_redis import LocalRedis
+        return LocalRedis()
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def _batched(it: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in it:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fetch_records(client, keys: List[str], transform=None, stats=None) -> List[Dict[str, Any]]:
+    """Pipelined GET + PTTL for *keys*; keys that vanished since SCAN are skipped."""
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+        pipe.pttl(key)
+    replies = pipe.execute()
+    now_ms = int(time.time() * 1000)
+    records = []
+    for i, key in enumerate(keys):
+        value, pttl = replies[2 * i], replies[2 * i + 1]
+        if value is None or pttl == -2:
+            if stats is not None:
+                stats.add("vanished")
+            continue
+        rec = {"key": key, "pttl": pttl, "at": now_ms}
+        try:
+            state = json.loads(value)
+        except ValueError:
+            state = None
+        if not isinstance(state, dict):
+            rec["raw"] = value
+        else:
+            if transform is not None:
+                state = _apply(transform, state, stats)
+                if state is None:
+                    state = json.loads(value)   # keep the untouched original
+            rec["state"] = state
+        records.append(rec)
+    return records
+
+
+def store_records(client, records: Iterable[Dict[str, Any]], ttl_mode: str = "keep",
+                  overwrite: bool = True, transform=None, stats=None) -> int:
+    """
+    Pipelined SETs for *records*. ttl_mode:
+      keep    – restore the PTTL captured at export time
+      elapsed – subtract the time since export
+      none    – store without expiry
+    Outside "none", records with no time left are skipped and counted as expired.
+    """
+    pipe = client.pipeline(transaction=False)
+    now_ms = int(time.time() * 1000)
+    queued = 0
+    for rec in records:
+        pttl = rec.get("pttl", -1)
+        if ttl_mode == "none":
+            pttl = -1
+        elif pttl >= 0:
+            if ttl_mode == "elapsed":
+                pttl -= now_ms - rec.get("at", now_ms)
+            if pttl <= 0:
+                if stats is not None:
+                    stats.add("expired")
+                continue
+        if "raw" in rec:
+            value = rec["raw"]
+        else:
+            state = rec["state"]
+            upgraded = _apply(transform, state, stats) if transform is not None else None
+            value = json.dumps(state if upgraded is None else upgraded)
+        kwargs = {"px": pttl} if pttl > 0 else {}
+        if not overwrite:
+            kwargs["nx"] = True
+        pipe.set(rec["key"], value, **kwargs)
+        queued += 1
+    written = sum(1 for ok in pipe.execute() if ok)
+    if stats is not None and not overwrite:
+        stats.add("existing", queued - written)
+    return written
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Parallel plumbing
+# ───────────────────────────────────────────────────────────────────────────────
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+
+def _fan_out(items: Iterable, workers: List[Callable[[Any], None]], depth: int = 2):
+    """
+    Feed *items* through a bounded queue to one thread per worker callable.
+    The first worker exception stops the run and is re-raised.
+    """
+    q = queue.Queue(maxsize=max(1, depth * len(workers)))
+    errors = []
+    stop = object()
+
+    def _run(fn):
+        while True:
+            item = q.get()
+            if item is stop:
+                return
+            if errors:
+                continue                # drain so the producer never blocks
+            try:
+                fn(item)
+            except BaseException as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=_run, args=(fn,), daemon=True) for fn in workers]
+    for t in threads:
+        t.start()
+    try:
+        for item in items:
+            if errors:
+                break
+            q.put(item)
+    finally:
+        for _ in threads:
+            q.put(stop)
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Operations
+# ───────────────────────────────────────────────────────────────────────────────
+
+def export_sessions(client, out_dir: str, shards: int = 4, match: str = DEFAULT_MATCH,
+                    batch: int = 500, transform=None, compresslevel: int = 6) -> Dict[str, Any]:
+    """Stream every key matching *match* into *shards* gzip'd NDJSON files."""
+    os.makedirs(out_dir, exist_ok=True)
+    stats = _Stats()
+    paths = [os.path.join(out_dir, SHARD_PATTERN.format(i)) for i in range(shards)]
+    files = [gzip.open(p, "wt", encoding="utf-8", compresslevel=compresslevel) for p in paths]
+    per_shard = [0] * shards
+
+    def _writer(idx):
+        f = files[idx]
+
+        def _write(keys):
+            records = fetch_records(client, keys, transform, stats)
+            f.writelines(json.dumps(rec, separators=(",", ":")) + "\n" for rec in records)
+            per_shard[idx] += len(records)
+        return _write
+
+    started = time.time()
+    try:
+        _fan_out(_batched(client.scan_iter(match=match, count=batch), batch),
+                 [_writer(i) for i in range(shards)])
+    finally:
+        for f in files:
+            f.close()
+
+    manifest = {
+        "match": match,
+        "state_version": STATE_VERSION,
+        "exported_at": started,
+        "seconds": round(time.time() - started, 3),
+        "records": sum(per_shard),
+        "shards": {os.path.basename(p): n for p, n in zip(paths, per_shard)},
+        **stats.counts,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _read_shard(path: str) -> Iterator[Dict[str, Any]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_sessions(client, paths: List[str], workers: int = 4, batch: int = 500,
+                    transform=None, ttl_mode: str = "keep",
+                    overwrite: bool = True) -> Dict[str, Any]:
+    """Restore shards with pipelined SETs, one shard per worker at a time."""
+    stats = _Stats()
+
+    def _load(path):
+        for records in _batched(_read_shard(path), batch):
+            stats.add("read", len(records))
+            stats.add("written", store_records(client, records, ttl_mode, overwrite,
+                                               transform, stats))
+
+    started = time.time()
+    _fan_out(paths, [_load] * max(1, min(workers, len(paths))), depth=1)
+    return dict(stats.counts, shards=len(paths), seconds=round(time.time() - started, 3))
+
+
+def migrate_sessions(src, dst, workers: int = 4, match: str = DEFAULT_MATCH,
+                     batch: int = 500, transform=None, overwrite: bool = True) -> Dict[str, Any]:
+    """Copy (and optionally upgrade) keys from *src* to *dst* without touching disk."""
+    stats = _Stats()
+
+    def _copy(keys):
+        records = fetch_records(src, keys, transform, stats)
+        stats.add("read", len(records))
+        stats.add("written", store_records(dst, records, "keep", overwrite, stats=stats))
+
+    started = time.time()
+    _fan_out(_batched(src.scan_iter(match=match, count=batch), batch), [_copy] * workers)
+    return dict(stats.counts, seconds=round(time.time() - started, 3))
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  CLI
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _shard_paths(inputs: List[str]) -> List[str]:
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.ndjson*"))))
+        else:
+            paths.append(item)
+    return paths
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk export / import / migrate Anchor sessions")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def _common(p):
+        p.add_argument("--url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        p.add_argument("--batch", type=int, default=500, help="keys per pipeline")
+        p.add_argument("--upgrade", action="store_true",
+                       help=f"upgrade snapshots to version {STATE_VERSION}")
+        p.add_argument("--upgrade-fn", help="extra per-record module:function")
+
+    p = sub.add_parser("export", help="Redis → gzip'd NDJSON shards")
+    _common(p)
+    p.add_argument("--out", required=True, help="output directory")
+    p.add_argument("--shards", type=int, default=4)
+    p.add_argument("--match", default=DEFAULT_MATCH)
+
+    p = sub.add_parser("import", help="shards → Redis")
+    _common(p)
+    p.add_argument("inputs", nargs="+", help="shard files or export directories")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--ttl-mode", choices=("keep", "elapsed", "none"), default="keep")
+    p.add_argument("--no-overwrite", action="store_true", help="skip keys that exist")
+
+    p = sub.add_parser("migrate", help="Redis → Redis")
+    _common(p)
+    p.add_argument("--to", required=True, help="destination Redis URL")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--match", default=DEFAULT_MATCH)
+    p.add_argument("--no-overwrite", action="store_true", help="skip keys that exist")
+
+    args = ap.parse_args(argv)
+    extra = load_callable(args.upgrade_fn) if args.upgrade_fn else None
+    transform = make_transform(args.upgrade, extra)
+    client = connect(args.url)
+
+    if args.cmd == "export":
+        result = export_sessions(client, args.out, args.shards, args.match,
+                                 args.batch, transform)
+    elif args.cmd == "import":
+        result = import_sessions(client, _shard_paths(args.inputs), args.workers,
+                                 args.batch, transform, args.ttl_mode,
+                                 not args.no_overwrite)
+    else:
+        result = migrate_sessions(client, connect(args.to), args.workers, args.match,
+                                  args.batch, transform, not args.no_overwrite)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
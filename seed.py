@@ -1,5 +1,28 @@
 import json
 import os
+import re
+
+# strings are matched first so "http://..." and ",}" inside values survive
+_COMMENT_RE = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.S)
+_TRAILING_COMMA_RE = re.compile(r'("(?:\\.|[^"\\])*")|,(?=\s*[}\]])')
+
+def load_json(path):
+    """
+    Read a seed / drift-lexicon file. Hand-edited files (e.g. CyberSec_*)
+    carry // comments, trailing commas or a stray "json" header line, so
+    those are stripped before parsing.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    text = _COMMENT_RE.sub(lambda m: m.group(1) or "", text).lstrip()
+    if text.startswith("json"):
+        text = text[4:]
+    text = _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or "", text)
+    return json.loads(text)
 
 def apply_seed(session, seed_id='default', seeds_dir='seeds', drift_lexicons_dir='drift_lexicons'):
     """
@@ -18,8 +41,7 @@ def apply_seed(session, seed_id='default', seeds_dir='seeds', drift_lexicons_dir
     if not os.path.exists(seed_path):
         return False
 
-    with open(seed_path, "r", encoding="utf-8") as f:
-        seed = json.load(f)
+    seed = load_json(seed_path)
 
     # 2. Core / anchor vector
     vec = seed.get("last_known_vector", {})
@@ -47,10 +69,9 @@ def apply_seed(session, seed_id='default', seeds_dir='seeds', drift_lexicons_dir
     drift_key = seed.get("consequence_drift_lexicon") or seed.get("consequence_drift_path")                 or "nrc_consequence_drift.json"
     lexicon_path = os.path.join(drift_lexicons_dir, drift_key)
     if os.path.exists(lexicon_path):
-        with open(lexicon_path, "r", encoding="utf-8") as lf:
-            session.consequence_drift_map = json.load(lf)
-            if hasattr(session, "behavior_log"):
-                session.behavior_log.append(f"[Seed] Loaded drift lexicon: {drift_key}")
+        session.consequence_drift_map = load_json(lexicon_path)
+        if hasattr(session, "behavior_log"):
+            session.behavior_log.append(f"[Seed] Loaded drift lexicon: {drift_key}")
     else:
         session.consequence_drift_map = {}
         if hasattr(session, "behavior_log"):
@@ -0,0 +1,200 @@
+import json, math, random
+
+import pytest
+
+from anchor_core_engine import AnchorSession, BEHAVIOR_LOG_KEEP
+from bridge_utils import get_anchor_state, initialize_anchor1_memory
+
+
+class _DictSession:
+    """Reference copy of the pre-slots, dict-backed tick() maths."""
+
+    def __init__(self):
+        self.core = {"Fear": 0.5, "Safety": 0.5, "Time": 0.5, "Choice": 0.5}
+        self.goal_vector = {"Fear": 0.2, "Safety": 0.8, "Time": 0.4, "Choice": 0.6}
+        self.memory_orbit, self.behavior_log = [], []
+        self.ticks, self.ego_resistance = 0, 0.5
+        self.curiosity, self.purpose = 0.5, 0.5
+        self.identity_coherence, self.goal_confidence = 1.0, 0.0
+        self.trust_level, self.trust_variance, self.distrust_decay = 0.5, 0.1, 0.01
+        self.priority_weights = {"environment": 0.4, "state": 0.6, "self": 0.8}
+        self.distrust = 1 - self.trust_level
+        self.efficiency_history, self.chaos_history = [], []
+
+    def update_trust_and_curiosity(self):
+        fear, safety, time_urgency = self.core["Fear"], self.core["Safety"], self.core["Time"]
+        self.curiosity = max(0, min(1, (safety - fear) * (1 - time_urgency)))
+
+    def update_goal_confidence(self):
+        dot = sum(self.core[a] * self.goal_vector[a] for a in self.core)
+        mag = math.sqrt(sum(v*v for v in self.core.values())) * math.sqrt(sum(v*v for v in self.goal_vector.values()))
+        self.goal_confidence = dot / max(1e-6, mag)
+
+    def get_identity_coherence(self):
+        avg = sum(abs(self.core[a] - self.goal_vector[a]) for a in self.core) / len(self.core)
+        self.identity_coherence = max(0.0, min(1.0, 1 - avg))
+        return self.identity_coherence
+
+    def _adaptive_corr(self):
+        win = min(50, len(self.efficiency_history)) if len(self.efficiency_history) > 20 else len(self.efficiency_history)
+        avg = sum(self.efficiency_history[-win:]) / max(1, win)
+        base = 0.5 + (self.ego_resistance - 0.5) * 0.2
+        return max(0.3, min(0.7, base + (avg - 0.5) * 0.3))
+
+    def _apply_updates(self, updates):
+        c = self._adaptive_corr()
+        for k, d in updates.items():
+            if k in self.core:
+                direction = d if self.goal_confidence > 0.5 else -c * d
+                self.core[k] = max(0, min(1, self.core[k] + direction))
+
+    def _soft_reset(self):
+        amt = 0.05 * (1 + self.ticks * 0.01)
+        for a in self.core:
+            if self.core[a] >= 0.9:
+                self.core[a] -= amt
+            elif self.core[a] <= 0.1:
+                self.core[a] += amt
+            self.core[a] = max(0, min(1, self.core[a]))
+
+    def _chaos_recalibrate(self):
+        hist = len(self.chaos_history)
+        avg = sum(self.chaos_history[-hist:]) / hist if hist else 0
+        dominant = max(self.core, key=lambda x: abs(self.core[x] - self.goal_vector[x]))
+        shift = 0.05 * (1 + avg * 0.1)
+        self.core[dominant] = max(0, min(1, self.core[dominant] - shift))
+        self.behavior_log.append(f"[Chaos] Recalibration on {dominant}")
+        self.chaos_history.append(avg)
+
+    def _drift_from_memory(self):
+        for mem in self.memory_orbit:
+            if mem.get("tier") == "active":
+                for anchor in self.core:
+                    self.core[anchor] = max(0, min(1, self.core[anchor] + mem.get("bias", {}).get(anchor, 0.0)))
+
+    def apply_ess_weights(self, deltas):
+        weighted = deltas.copy()
+        for anchor in weighted:
+            if anchor in ("Fear", "Safety"):
+                weighted[anchor] *= self.priority_weights["environment"]
+            elif anchor == "Time":
+                weighted[anchor] *= self.priority_weights["state"]
+            elif anchor == "Choice":
+                weighted[anchor] *= self.priority_weights["self"]
+        return weighted
+
+    def is_in_chaos(self):
+        return sum(abs(self.core[k] - self.goal_vector[k]) for k in self.core) > 1.2
+
+    def tick(self, updates=None, positive=True):
+        updates = updates or {k: 0.0 for k in self.core}
+        delta = self.trust_variance if positive else -self.trust_variance
+        self.trust_level = max(0, min(1, self.trust_level + delta))
+        self.distrust = max(0, min(1, 1 - self.trust_level + self.distrust_decay))
+        self.update_trust_and_curiosity()
+        self.update_goal_confidence()
+        if self.curiosity > 0:
+            g = self.curiosity * 0.05
+            updates = {k: updates.get(k, 0)+random.uniform(-g, g) for k in self.core}
+        if self.purpose > 0.7:
+            bias = {k: (self.goal_vector[k] - self.core[k]) * 0.05 * self.purpose for k in self.core}
+            updates = {k: updates.get(k, 0)+bias[k] for k in self.core}
+        self._chaos_recalibrate()
+        updates = self.apply_ess_weights(updates)
+        self._apply_updates(updates)
+        self._drift_from_memory()
+        self._soft_reset()
+        self.ticks += 1
+        if self.get_identity_coherence() < 0.4:
+            self.behavior_log.append("[Identity Warning] Coherence below threshold")
+        if self.is_in_chaos():
+            self.behavior_log.append("[Chaos] Drift threshold exceeded. Collapse imminent.")
+
+
+def _drive(sess, rng_seed, fear_push):
+    random.seed(rng_seed)
+    sess.core["Safety"] = 0.9
+    sess.core["Fear"] = 0.15
+    sess.purpose = 0.8
+    sess.memory_orbit.append({"id": "m1", "tier": "active", "bias": {"Time": 0.01}})
+    for i in range(60):
+        fear = fear_push if fear_push else 0.05 * (-1) ** i
+        sess.tick({"Fear": fear, "Choice": 0.02}, positive=i % 3 != 0)
+
+
+@pytest.mark.parametrize("rng_seed", [0, 7, 1234])
+@pytest.mark.parametrize("fear_push", [0.0, -0.6])
+def test_seeded_tick_matches_dict_reference(rng_seed, fear_push):
+    ref, sess = _DictSession(), AnchorSession()
+    _drive(ref, rng_seed, fear_push)
+    _drive(sess, rng_seed, fear_push)
+
+    assert dict(sess.core) == ref.core
+    assert dict(sess.goal_vector) == ref.goal_vector
+    assert sess.behavior_log == ref.behavior_log[-len(sess.behavior_log):]
+    assert len(sess.behavior_log) >= min(len(ref.behavior_log), BEHAVIOR_LOG_KEEP)
+    assert sess.ticks == ref.ticks
+    assert sess.goal_confidence == ref.goal_confidence
+    assert sess.identity_coherence == ref.identity_coherence
+    assert sess.curiosity == ref.curiosity
+    assert sess.trust_level == ref.trust_level
+    assert sess.is_in_chaos() == ref.is_in_chaos()
+
+
+def test_export_import_round_trip():
+    random.seed(3)
+    src = AnchorSession()
+    src.memory_orbit.append({"id": "m1", "tier": "dormant"})
+    for _ in range(10):
+        src.tick({"Fear": 0.1})
+    state = json.loads(json.dumps(src.export_state()))
+
+    dst = AnchorSession()
+    dst.import_state(state)
+    assert dst.export_state() == src.export_state()
+    assert isinstance(state["core"], dict) and set(state["core"]) == set(src.core)
+
+
+def test_vector_views_behave_like_dicts():
+    sess = AnchorSession()
+    sess.core["Fear"] = 0.9
+    assert sess.core["Fear"] == 0.9 and sess.core.get("Nope", 1) == 1
+    sess.core = {"Safety": 0.1, "Unknown": 3.0}      # unknown keys are ignored
+    assert sess.core.copy() == {"Fear": 0.9, "Safety": 0.1, "Time": 0.5, "Choice": 0.5}
+    with pytest.raises(KeyError):
+        sess.core["Unknown"] = 1.0
+
+
+def test_priority_weights_copy_on_write():
+    a, b = AnchorSession(), AnchorSession()
+    a.priority_weights["self"] = 0.3
+    assert a.priority_weights["self"] == 0.3
+    assert b.priority_weights["self"] == 0.8
+    assert AnchorSession().apply_ess_weights({"Choice": 1.0}) == {"Choice": 0.8}
+    assert a.apply_ess_weights({"Choice": 1.0}) == {"Choice": 0.3}
+
+
+def test_diagnostics_do_not_allocate_lazy_lists():
+    sess = AnchorSession()
+    state = get_anchor_state(sess)
+    initialize_anchor1_memory(sess, [])
+    assert state["last_behavior"] is None and state["memory_nodes"] == []
+    assert sess._behavior_log is None and sess._memory_orbit is None
+
+    initialize_anchor1_memory(sess, [{"id": "a"}, {"id": "b"}])
+    initialize_anchor1_memory(sess, [{"id": "a"}])
+    assert [n["id"] for n in sess.memory_orbit] == ["a", "b"]
+
+
+def test_behavior_log_is_bounded():
+    random.seed(5)
+    sess = AnchorSession()
+    for _ in range(1000):
+        sess.tick({"Fear": 0.3})
+    assert len(sess.behavior_log) <= 2 * BEHAVIOR_LOG_KEEP
+    state = sess.export_state()
+    assert state["behavior_log"] == sess.behavior_log[-BEHAVIOR_LOG_KEEP:]
+
+    restored = AnchorSession()
+    restored.import_state({"behavior_log": ["x"] * (3 * BEHAVIOR_LOG_KEEP)})
+    assert len(restored.behavior_log) == BEHAVIOR_LOG_KEEP
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from cyber_ingest import CyberIngestor, CyberLexicon, DEFAULT_LEXICON, DEFAULT_SEED
+from seed import load_json
+
+T0 = 1_700_000_000.0
+
+
+@pytest.fixture
+def ingestor():
+    return CyberIngestor(load_json(DEFAULT_SEED), CyberLexicon.from_file(DEFAULT_LEXICON),
+                         window=60.0, lateness=5.0)
+
+
+def test_wrongly_typed_fields_are_counted_not_fatal(ingestor):
+    bad = ['{"ts":[1]}', '{"ts":{"a":1},"src_ip":"10.0.0.1"}', '{"ts":NaN}',
+           '{"src_ip":["a"]}', '{"session_id":{"a":1}}', '{"playbook":["x"]}']
+    ingestor.feed_lines(bad + [json.dumps({"ts": T0, "src_ip": "10.0.0.1", "msg": "ok"})])
+    ingestor.close()
+    st = ingestor.stats
+    assert st["events"] == 7 and st["malformed"] == 3
+    assert st["ticks"] >= 1
+
+
+def test_future_dated_event_does_not_stall_windows(ingestor):
+    now = T0 + 3600
+    ingestor.feed({"ts": T0 + 1e7, "src_ip": "10.0.0.9"}, now=now)
+    for i in range(1000):
+        ingestor.feed({"ts": T0 + i, "src_ip": "10.0.0.1"}, now=now)
+    assert ingestor.stats["ticks"] >= 15 and ingestor.stats["late"] == 0
+    assert ingestor._open <= 3
+
+
+def test_watermark_follows_a_confirmed_jump(ingestor):
+    for i in range(10):
+        ingestor.feed({"ts": T0 + i}, now=T0 + 1e6)
+    for i in range(ingestor.jump_confirm):
+        ingestor.feed({"ts": T0 + 5000 + i}, now=T0 + 1e6)
+    assert ingestor.stats["windows"] == 1
+
+
+def _playbook_then_background(ingestor, now):
+    for i in range(3):
+        ingestor.feed({"ts": T0 + i, "src_ip": "6.6.6.6", "severity": "critical",
+                       "playbook": "ransomware-containment", "msg": "ransomware"}, now=now)
+    for w in range(1, 60):
+        ingestor.feed({"ts": T0 + 60 * w, "src_ip": "10.0.0.1", "severity": "low"}, now=now)
+
+
+def test_soft_learn_whitelists_the_playbook_source():
+    ing = CyberIngestor(load_json(DEFAULT_SEED), CyberLexicon.from_file(DEFAULT_LEXICON),
+                        whitelist_learn=True)
+    _playbook_then_background(ing, T0 + 1e6)
+    assert list(ing.session("soc").dynamic_whitelist) == ["6.6.6.6"]
+    assert ing.stats["playbooks"] == 1 and ing.stats["whitelisted"] == 0
+
+
+def test_expired_whitelist_entries_are_dropped(ingestor):
+    sess = ingestor.session("soc")
+    sess.dynamic_whitelist.update({"1.1.1.1": 0, "2.2.2.2": 10_000})
+    ingestor.feed({"ts": T0, "src_ip": "1.1.1.1"}, now=T0)
+    ingestor.close()
+    assert sess.dynamic_whitelist == {"2.2.2.2": 10_000}
+    assert ingestor.stats["whitelisted"] == 0
+
+
+def test_evicted_session_with_open_windows_is_counted():
+    ing = CyberIngestor(load_json(DEFAULT_SEED), CyberLexicon.from_file(DEFAULT_LEXICON),
+                        max_sessions=1)
+    ing.feed({"ts": T0, "session_id": "a"}, now=T0)
+    ing.feed({"ts": T0, "session_id": "b"}, now=T0)
+    ing.close()
+    assert ing.stats["evicted"] >= 1 and ing.stats["recreated"] >= 1
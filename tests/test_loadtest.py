@@ -0,0 +1,19 @@
+import pytest
+
+from loadtest import DEFAULT_MIXES, parse_mix, percentile
+
+
+def test_default_mixes_fit_their_app():
+    for app, spec in DEFAULT_MIXES.items():
+        assert parse_mix(spec, app)
+
+
+def test_bridge_rejects_get_full_state():
+    with pytest.raises(ValueError):
+        parse_mix("send_input=1,get_full_state=1", "bridge")
+
+
+def test_nearest_rank_percentile():
+    vals = list(range(1, 101))
+    assert (percentile(vals, 50), percentile(vals, 95), percentile(vals, 99)) == (50, 95, 99)
+    assert percentile([], 50) is None
@@ -0,0 +1,48 @@
+import json
+
+from anchor_core_engine import STATE_VERSION
+from local_redis import LocalRedis
+from redis_bulk import (_Stats, export_sessions, import_sessions, make_transform,
+                        migrate_sessions, store_records)
+
+
+def _fail_on_marker(state):
+    if state.get("boom"):
+        raise RuntimeError("boom")
+    return state
+
+
+def test_migrate_upgrade_survives_odd_values():
+    src, dst = LocalRedis(), LocalRedis()
+    src.set("anchor:old", json.dumps({"ticks": 3}))
+    src.set("anchor:num", "5")
+    src.set("anchor:text", "not json")
+    src.set("anchor:bad", json.dumps({"version": STATE_VERSION, "boom": True}))
+
+    result = migrate_sessions(src, dst, workers=2, transform=make_transform(True, _fail_on_marker))
+    assert result["written"] == 4 and result["upgrade_failed"] == 1
+    assert json.loads(dst.get("anchor:old"))["version"] == STATE_VERSION
+    assert dst.get("anchor:num") == "5" and dst.get("anchor:text") == "not json"
+    assert json.loads(dst.get("anchor:bad"))["boom"] is True
+
+
+def test_zero_pttl_is_not_restored_as_immortal():
+    client, stats = LocalRedis(), _Stats()
+    records = [{"key": "anchor:gone", "pttl": 0, "state": {}},
+               {"key": "anchor:kept", "pttl": -1, "state": {}}]
+    assert store_records(client, records, "keep", stats=stats) == 1
+    assert stats.counts == {"expired": 1}
+    assert client.get("anchor:gone") is None and client.pttl("anchor:kept") == -1
+
+
+def test_import_keeps_record_unchanged_when_transform_fails(tmp_path):
+    src, dst = LocalRedis(), LocalRedis()
+    src.set("anchor:old", json.dumps({"ticks": 3, "boom": True}))
+    src.set("anchor:new", json.dumps({"ticks": 4}))
+    export_sessions(src, str(tmp_path), shards=1)
+
+    result = import_sessions(dst, [str(tmp_path / "anchor-0000.ndjson.gz")],
+                             transform=make_transform(True, _fail_on_marker))
+    assert result["written"] == 2 and result["upgrade_failed"] == 1
+    assert json.loads(dst.get("anchor:old")) == {"ticks": 3, "boom": True}
+    assert json.loads(dst.get("anchor:new"))["version"] == STATE_VERSION
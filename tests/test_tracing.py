@@ -0,0 +1,51 @@
+import asyncio, os
+
+from tracing import PROFILE_HEADER, PROFILE_ID_HEADER, TraceConfig, TracingMiddleware
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _call(mw, header=None):
+    headers = [(PROFILE_HEADER, header)] if header is not None else []
+    sent = []
+
+    async def _send(message):
+        sent.append(message)
+
+    asyncio.run(mw({"type": "http", "method": "GET", "path": "/", "headers": headers},
+                   None, _send))
+    return dict(sent[0]["headers"]).get(PROFILE_ID_HEADER)
+
+
+def _middleware(tmp_path, **env):
+    cfg = TraceConfig({"ANCHOR_TRACE": "1", "ANCHOR_TRACE_SLOW_MS": "1e9",
+                       "ANCHOR_TRACE_FILE": str(tmp_path / "slow.jsonl"),
+                       "ANCHOR_PROFILE_DIR": str(tmp_path / "profiles"), **env})
+    return TracingMiddleware(_ok, service="main", config=cfg)
+
+
+def test_profiling_needs_a_configured_token(tmp_path):
+    mw = _middleware(tmp_path)
+    assert _call(mw, b"1") is None
+    assert not os.path.exists(tmp_path / "profiles")
+
+
+def test_profiles_match_token_and_are_capped(tmp_path):
+    mw = _middleware(tmp_path, ANCHOR_PROFILE_TOKEN="s3cret", ANCHOR_PROFILE_MAX_FILES="3")
+    assert _call(mw, b"wrong") is None
+    ids = [_call(mw, b"s3cret") for _ in range(5)]
+    assert all(ids)
+    assert len(os.listdir(tmp_path / "profiles")) == 3
+
+
+def test_each_middleware_writes_its_own_trace_file(tmp_path):
+    for name in ("a", "b"):
+        mw = _middleware(tmp_path / name, ANCHOR_TRACE_SLOW_MS="0")
+        _call(mw)
+        mw.log.handlers[0].flush()
+    for name in ("a", "b"):
+        with open(tmp_path / name / "slow.jsonl", encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
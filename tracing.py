@@ -0,0 +1,286 @@
+"""
+tracing.py
+----------
+Opt-in request tracing for main.py / bridge.py.
+
+• `span("redis.get")` times one stage of the current request; it is a
+  near no-op when no trace is active, so call sites can stay in place
+• `install(app, service)` adds a pure-ASGI middleware (only when
+  ANCHOR_TRACE=1) that opens a trace per request and writes the full trace
+  of every request slower than ANCHOR_TRACE_SLOW_MS to a rotating JSONL file
+• A request whose `X-Anchor-Profile` header matches ANCHOR_PROFILE_TOKEN
+  additionally runs a sampling profiler on the serving thread; the
+  folded-stack artifact is written to ANCHOR_PROFILE_DIR (oldest pruned past
+  ANCHOR_PROFILE_MAX_FILES) and its id returned in `X-Anchor-Profile-Id`
+
+Environment:
+    ANCHOR_TRACE             1 to enable (default off)
+    ANCHOR_TRACE_SLOW_MS     slow-request threshold, ms (default 500)
+    ANCHOR_TRACE_FILE        traces/slow_requests.jsonl
+    ANCHOR_TRACE_MAX_BYTES   rotate after this size (default 10 MB)
+    ANCHOR_TRACE_BACKUPS     rotated files kept (default 5)
+    ANCHOR_PROFILE_DIR       traces/profiles
+    ANCHOR_PROFILE_TOKEN     required for profiling; the header must carry it
+    ANCHOR_PROFILE_MAX_FILES profiles kept (default 50)
+    ANCHOR_PROFILE_INTERVAL_MS  sampling interval (default 2)
+"""
+import hmac, json, logging, os, sys, threading, time, uuid
+from collections import Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+PROFILE_HEADER = b"x-anchor-profile"
+PROFILE_ID_HEADER = b"x-anchor-profile-id"
+TRACE_ID_HEADER = b"x-anchor-trace-id"
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("anchor_trace", default=None)
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Spans
+# ───────────────────────────────────────────────────────────────────────────────
+
+class Trace:
+    __slots__ = ("trace_id", "t0", "wall", "spans", "attrs", "depth")
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.t0 = time.perf_counter()
+        self.wall = time.time()
+        self.spans = []             # (name, start offset s, duration s, depth)
+        self.attrs = {}
+        self.depth = 0
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace, self.name = trace, name
+
+    def __enter__(self):
+        self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        tr = self.trace
+        tr.depth -= 1
+        tr.spans.append((self.name, self.start - tr.t0, end - self.start, tr.depth))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """Time a stage of the current request (no-op outside a trace)."""
+    tr = _current.get()
+    return _NULL_SPAN if tr is None else _Span(tr, name)
+
+
+def annotate(key: str, value: Any) -> None:
+    """Attach a small attribute (e.g. session_id) to the current trace."""
+    tr = _current.get()
+    if tr is not None:
+        tr.attrs[key] = value
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Sampling profiler
+# ───────────────────────────────────────────────────────────────────────────────
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack every *interval* seconds from a helper thread
+    and aggregates folded stacks ("mod:func;mod:func N"), the format read by
+    flamegraph.pl and speedscope. Anything else running on that thread
+    (other requests on the same event loop) shows up in the samples too.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.002, max_seconds: float = 30.0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="anchor-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        frames, tid = sys._current_frames, self.thread_id
+        while True:
+            frame = frames().get(tid)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+            if self._stop.wait(self.interval) or time.monotonic() >= deadline:
+                return
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  Config / sinks
+# ───────────────────────────────────────────────────────────────────────────────
+
+class TraceConfig:
+    def __init__(self, env=os.environ):
+        self.enabled = env.get("ANCHOR_TRACE", "0").lower() in ("1", "true", "yes", "on")
+        self.slow_ms = float(env.get("ANCHOR_TRACE_SLOW_MS", 500))
+        self.trace_file = env.get("ANCHOR_TRACE_FILE", os.path.join("traces", "slow_requests.jsonl"))
+        self.max_bytes = int(env.get("ANCHOR_TRACE_MAX_BYTES", 10 * 1024 * 1024))
+        self.backups = int(env.get("ANCHOR_TRACE_BACKUPS", 5))
+        self.profile_dir = env.get("ANCHOR_PROFILE_DIR", os.path.join("traces", "profiles"))
+        self.profile_token = env.get("ANCHOR_PROFILE_TOKEN") or None
+        self.profile_max_files = int(env.get("ANCHOR_PROFILE_MAX_FILES", 50))
+        self.profile_interval = float(env.get("ANCHOR_PROFILE_INTERVAL_MS", 2)) / 1000.0
+
+
+def _trace_logger(cfg: TraceConfig, service: str) -> logging.Logger:
+    """
+    A private (unregistered) logger with its own RotatingFileHandler, so two
+    middlewares for the same service never share a file or rotation settings.
+    """
+    os.makedirs(os.path.dirname(cfg.trace_file) or ".", exist_ok=True)
+    handler = RotatingFileHandler(cfg.trace_file, maxBytes=cfg.max_bytes,
+                                  backupCount=cfg.backups, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log = logging.Logger(f"anchor.trace.{service}", logging.INFO)
+    log.addHandler(handler)
+    return log
+
+
+def trace_record(tr: Trace, service: str, method: str, path: str,
+                 status: Optional[int], duration: float,
+                 profile_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "trace_id": tr.trace_id,
+        "service": service,
+        "method": method,
+        "path": path,
+        "status": status,
+        "start": round(tr.wall, 6),
+        "duration_ms": round(duration * 1000, 3),
+        "spans": [
+            {"name": n, "start_ms": round(s * 1000, 3), "duration_ms": round(d * 1000, 3),
+             "depth": depth}
+            for n, s, d, depth in sorted(tr.spans, key=lambda sp: sp[1])
+        ],
+        "attrs": tr.attrs,
+        "profile_id": profile_id,
+    }
+
+# ───────────────────────────────────────────────────────────────────────────────
+#  ASGI middleware
+# ───────────────────────────────────────────────────────────────────────────────
+
+class TracingMiddleware:
+    def __init__(self, app, service: str = "anchor", config: Optional[TraceConfig] = None):
+        self.app = app
+        self.service = service
+        self.cfg = config or TraceConfig()
+        self.log = _trace_logger(self.cfg, service)
+        self._profile_slot = threading.Lock()      # one profile at a time
+
+    def _wants_profile(self, scope) -> bool:
+        token = self.cfg.profile_token
+        if not token:
+            return False                    # profiling is off without a token
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, token.encode("utf-8"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        tr = Trace()
+        token = _current.set(tr)
+        profiler = profile_id = None
+        if self._wants_profile(scope) and self._profile_slot.acquire(blocking=False):
+            profile_id = f"{self.service}-{tr.trace_id}"
+            profiler = SamplingProfiler(threading.get_ident(), self.cfg.profile_interval).start()
+        status = None
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((TRACE_ID_HEADER, tr.trace_id.encode()))
+                if profile_id:
+                    headers.append((PROFILE_ID_HEADER, profile_id.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            duration = time.perf_counter() - tr.t0
+            _current.reset(token)
+            if profiler is not None:
+                profiler.stop()
+                self._profile_slot.release()
+                self._write_profile(profile_id, profiler)
+            if profile_id or duration * 1000 >= self.cfg.slow_ms:
+                self.log.info(json.dumps(trace_record(
+                    tr, self.service, scope.get("method"), scope.get("path"),
+                    status, duration, profile_id)))
+
+    def _write_profile(self, profile_id: str, profiler: SamplingProfiler):
+        os.makedirs(self.cfg.profile_dir, exist_ok=True)
+        path = os.path.join(self.cfg.profile_dir, f"{profile_id}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.folded())
+        self._prune_profiles()
+
+    def _prune_profiles(self):
+        """Keep only the newest ANCHOR_PROFILE_MAX_FILES artifacts."""
+        d = self.cfg.profile_dir
+        entries = []
+        for name in os.listdir(d):
+            if name.endswith(".folded"):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(d, name)), name))
+                except OSError:
+                    pass                    # removed concurrently
+        entries.sort()
+        for _, name in entries[:max(0, len(entries) - self.cfg.profile_max_files)]:
+            try:
+                os.remove(os.path.join(d, name))
+            except OSError:
+                pass
+
+
+def install(app, service: str, config: Optional[TraceConfig] = None) -> bool:
+    """Wrap *app* with TracingMiddleware if tracing is enabled; returns whether it did."""
+    cfg = config or TraceConfig()
+    if not cfg.enabled:
+        return False
+    app.add_middleware(TracingMiddleware, service=service, config=cfg)
+    return True